@@ -0,0 +1,160 @@
+# scripts/batch_writer.py
+"""
+Pipelined batch writer for PostgREST/Supabase upserts.
+Rows are cut into batches and handed to a small thread pool with a bounded number of
+requests in flight, so round-trip latency overlaps instead of adding up batch after batch.
+The batch size adapts as results come back: it grows while requests finish well under the
+target latency and shrinks when they run slow, and it is always capped by payload bytes.
+Each failed batch is retried on its own with backoff; per-batch timings feed report().
+"""
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterable, List
+
+# ---------------------------
+# Tunables
+# ---------------------------
+UPSERT_MAX_IN_FLIGHT = int(os.environ.get("UPSERT_MAX_IN_FLIGHT", 4))  # concurrent requests
+UPSERT_MIN_ROWS = int(os.environ.get("UPSERT_MIN_ROWS", 100))
+UPSERT_MAX_ROWS = int(os.environ.get("UPSERT_MAX_ROWS", 2000))
+UPSERT_MAX_BYTES = int(os.environ.get("UPSERT_MAX_BYTES", 512 * 1024))  # JSON payload cap per request
+UPSERT_TARGET_LATENCY = float(os.environ.get("UPSERT_TARGET_LATENCY", 2.0))  # seconds per request
+UPSERT_RETRIES = int(os.environ.get("UPSERT_RETRIES", 3))
+UPSERT_RETRY_DELAY = float(os.environ.get("UPSERT_RETRY_DELAY", 2))
+
+
+class BatchWriteError(Exception):
+    """Raised by PipelinedWriter.run when some batches still failed after their retries."""
+
+
+def payload_bytes(rows: List[dict]) -> int:
+    return len(json.dumps(rows, separators=(",", ":")))
+
+
+class PipelinedWriter:
+    """Sends rows through send(batch) in adaptively sized batches with at most max_in_flight outstanding."""
+
+    def __init__(self, send: Callable[[List[dict]], object], label: str = "upsert",
+                 initial_rows: int = 500, min_rows: int = UPSERT_MIN_ROWS, max_rows: int = UPSERT_MAX_ROWS,
+                 max_bytes: int = UPSERT_MAX_BYTES, max_in_flight: int = UPSERT_MAX_IN_FLIGHT,
+                 target_latency: float = UPSERT_TARGET_LATENCY, retries: int = UPSERT_RETRIES,
+                 retry_delay: float = UPSERT_RETRY_DELAY):
+        self.send = send
+        self.label = label
+        self.min_rows = max(1, min(min_rows, max_rows))
+        self.max_rows = max(self.min_rows, max_rows)
+        self.batch_rows = max(self.min_rows, min(initial_rows, self.max_rows))
+        self.max_bytes = max_bytes
+        self.max_in_flight = max(1, max_in_flight)
+        self.target_latency = target_latency
+        self.retries = max(1, retries)
+        self.retry_delay = retry_delay
+        self.bytes_per_row = None  # running estimate, set from the first batch
+        self.lock = threading.Lock()
+        self.batches = []  # {"rows", "bytes", "seconds", "attempts", "ok"}
+
+    # --- sizing ---
+    def _next_size(self) -> int:
+        with self.lock:
+            size = self.batch_rows
+            if self.bytes_per_row:
+                size = min(size, int(self.max_bytes // self.bytes_per_row))
+        return max(self.min_rows, size)
+
+    def _adapt(self, rows: int, size: int, seconds: float):
+        """Grows the batch 1.5x while requests are fast, halves it when one exceeds the target latency."""
+        with self.lock:
+            per_row = size / rows
+            self.bytes_per_row = per_row if self.bytes_per_row is None else 0.8 * self.bytes_per_row + 0.2 * per_row
+            if seconds > self.target_latency:
+                self.batch_rows = max(self.min_rows, self.batch_rows // 2)
+            elif seconds < self.target_latency / 2 and rows >= self.batch_rows:
+                self.batch_rows = min(self.max_rows, int(self.batch_rows * 1.5))
+
+    # --- sending ---
+    def _send_batch(self, batch: List[dict]) -> dict:
+        size = payload_bytes(batch)
+        started = time.perf_counter()
+        last_error = None
+        for attempt in range(1, self.retries + 1):
+            attempt_started = time.perf_counter()
+            try:
+                self.send(batch)
+                self._adapt(len(batch), size, time.perf_counter() - attempt_started)
+                return {"rows": len(batch), "bytes": size, "seconds": time.perf_counter() - started,
+                        "attempts": attempt, "ok": True}
+            except Exception as e:
+                last_error = e
+                print(f"{self.label}: batch of {len(batch)} rows failed (attempt {attempt}/{self.retries}): {e}")
+                if attempt < self.retries:
+                    time.sleep(self.retry_delay * attempt)
+        return {"rows": len(batch), "bytes": size, "seconds": time.perf_counter() - started,
+                "attempts": self.retries, "ok": False, "error": str(last_error)}
+
+    def run(self, rows: Iterable[dict]) -> dict:
+        """Writes all rows; raises BatchWriteError (after every other batch was sent) if any batch kept failing."""
+        rows = iter(rows)
+        in_flight = set()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            exhausted = False
+            while not exhausted or in_flight:
+                # Keep the pipeline full; each new batch is sized from the latest feedback
+                while not exhausted and len(in_flight) < self.max_in_flight:
+                    batch = []
+                    size = self._next_size()
+                    for row in rows:
+                        batch.append(row)
+                        if len(batch) >= size:
+                            break
+                    if len(batch) < size:
+                        exhausted = True
+                    if batch:
+                        in_flight.add(pool.submit(self._send_batch, batch))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.batches.append(future.result())
+
+        stats = self.stats()
+        if stats["failed_batches"]:
+            raise BatchWriteError(f"{self.label}: {stats['failed_batches']} batches ({stats['failed_rows']} rows) "
+                                  f"failed after {self.retries} attempts")
+        return stats
+
+    # --- metrics ---
+    def stats(self) -> dict:
+        ok = [b for b in self.batches if b["ok"]]
+        failed = [b for b in self.batches if not b["ok"]]
+        latencies = sorted(b["seconds"] for b in ok)
+        return {
+            "batches": len(self.batches),
+            "rows": sum(b["rows"] for b in ok),
+            "bytes": sum(b["bytes"] for b in ok),
+            "retried_batches": sum(1 for b in self.batches if b["attempts"] > 1),
+            "failed_batches": len(failed),
+            "failed_rows": sum(b["rows"] for b in failed),
+            "p50_seconds": latencies[len(latencies) // 2] if latencies else 0.0,
+            "max_seconds": latencies[-1] if latencies else 0.0,
+            "final_batch_rows": self.batch_rows,
+        }
+
+    def report(self, elapsed: float = None):
+        s = self.stats()
+        rate = f", {s['rows'] / elapsed:.0f} rows/s" if elapsed else ""
+        print(f"{self.label}: {s['rows']} rows in {s['batches']} batches ({s['bytes'] / 1024:.0f} KiB{rate}), "
+              f"latency p50 {s['p50_seconds']:.2f}s max {s['max_seconds']:.2f}s, "
+              f"{s['retried_batches']} retried, {s['failed_batches']} failed, batch size now {s['final_batch_rows']}")
+
+
+def write_pipelined(send: Callable[[List[dict]], object], rows: Iterable[dict], label: str = "upsert", **kwargs) -> dict:
+    """One-shot helper: runs a PipelinedWriter over rows and prints its report."""
+    writer = PipelinedWriter(send, label=label, **kwargs)
+    started = time.perf_counter()
+    try:
+        return writer.run(rows)
+    finally:
+        writer.report(time.perf_counter() - started)
@@ -0,0 +1,152 @@
+# scripts/bench_html_tables.py
+"""
+Benchmark: streaming extract_table_symbols vs the old pandas.read_html path on saved
+Wikipedia index pages. Pages are read from --fixtures (default .cache/fixtures/wikipedia);
+--download saves the importer's Wikipedia pages there first. With no fixtures at all, a
+synthetic Wikipedia-shaped page is generated so the comparison can still run offline.
+
+Usage: python scripts/bench_html_tables.py [--download] [--fixtures DIR] [--repeat 3]
+"""
+import io
+import os
+import glob
+import time
+import random
+import string
+import argparse
+import tracemalloc
+
+from disk_cache import CACHE_DIR
+from html_tables import extract_table_symbols
+
+WIKI_PAGES = {
+    "sp500": "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies",
+    "sp400": "https://en.wikipedia.org/wiki/List_of_S%26P_400_companies",
+    "sp600": "https://en.wikipedia.org/wiki/List_of_S%26P_600_companies",
+    "r1000": "https://en.wikipedia.org/wiki/Russell_1000_Index",
+    "r2000": "https://en.wikipedia.org/wiki/Russell_2000",
+    "r3000": "https://en.wikipedia.org/wiki/Russell_3000_Index",
+    "djia": "https://en.wikipedia.org/wiki/Dow_Jones_Industrial_Average",
+}
+PANDAS_NA_TOKENS = {"NA", "NAN", "NULL", "NONE", "N/A"}
+
+
+def pandas_extract(html: str):
+    """The previous fetch_symbols_from_wikipedia parsing step, verbatim."""
+    import pandas as pd
+    tables = pd.read_html(io.StringIO(html))
+    for df in tables:
+        cols = [str(c).lower() for c in df.columns]
+        for candidate in ("symbol", "ticker", "ticker symbol", "ticker(s)", "code"):
+            if any(candidate in c for c in cols):
+                for c in df.columns:
+                    if candidate in str(c).lower():
+                        try:
+                            vals = df[c].astype(str).tolist()
+                            syms = [v.split()[0].split('[')[0].strip().upper() for v in vals if v and str(v).strip() != ""]
+                            syms = [s for s in syms if s and len(s) <= 12]
+                            if syms:
+                                return syms
+                        except Exception:
+                            continue
+    first = tables[0]
+    vals = first.iloc[:, 0].astype(str).tolist()
+    syms = [v.split()[0].split('[')[0].strip().upper() for v in vals if v and str(v).strip() != ""]
+    return [s for s in syms if s and len(s) <= 12]
+
+
+def download_fixtures(directory: str):
+    from http_session import get_session
+    os.makedirs(directory, exist_ok=True)
+    session = get_session()
+    for name, url in WIKI_PAGES.items():
+        r = session.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=30)
+        r.raise_for_status()
+        with open(os.path.join(directory, f"{name}.html"), "w", encoding="utf-8") as f:
+            f.write(r.text)
+        print(f"Saved {name} ({len(r.text) / 1024:.0f} KiB)")
+
+
+def synthetic_page(rows: int = 600, seed: int = 7) -> str:
+    """Head scripts + lead prose, infobox, constituents table (footnotes, hidden sort keys),
+    then a large "changes" table and navbox tables, roughly the shape of the S&P 500 article."""
+    rng = random.Random(seed)
+    word = lambda: "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+    parts = ["<html><head>",
+             "".join(f"<script>var c{i} = '{word() * 20}';</script><style>.c{i}{{color:red}}</style>" for i in range(300)),
+             "</head><body>",
+             "".join(f"<p>{' '.join(word() for _ in range(80))}<sup>[{i}]</sup></p>" for i in range(40)),
+             '<table class="infobox"><tr><th>Foundation</th><td>1957</td></tr><tr><th>Operator</th><td>S&amp;P</td></tr></table>',
+             '<table class="wikitable sortable"><tbody><tr><th>Symbol</th><th>Security</th><th>GICS Sector</th>'
+             '<th>Headquarters</th><th>Date added</th><th>Founded</th></tr>']
+    for i in range(rows):
+        sym = "".join(rng.choices(string.ascii_uppercase, k=rng.randint(1, 4)))
+        if sym in PANDAS_NA_TOKENS:
+            # read_html turns these into float NaN and the old path then skips the whole table
+            sym += "X"
+        note = f"<sup>[{i % 9}]</sup>" if i % 17 == 0 else ""
+        parts.append(f'<tr><td><a href="/wiki/{sym}">{sym}</a>{note}</td><td><a href="#">{word().title()} Inc.</a></td>'
+                     f'<td><span style="display:none">{i:05d}</span>{word().title()}</td><td>{word().title()}, USA</td>'
+                     f'<td>2001-01-{1 + i % 28:02d}</td><td>19{i % 100:02d}</td></tr>')
+    parts.append("</tbody></table>")
+    parts.append('<table class="wikitable"><tr><th rowspan="2">Date</th><th colspan="2">Added</th><th colspan="2">Removed</th>'
+                 '<th rowspan="2">Reason</th></tr><tr><th>Ticker</th><th>Security</th><th>Ticker</th><th>Security</th></tr>')
+    parts.extend(f"<tr><td>20{i % 25:02d}-06-01</td><td>{word().upper()[:4]}</td><td>{word()}</td><td>{word().upper()[:4]}</td>"
+                 f"<td>{word()}</td><td>{' '.join(word() for _ in range(25))}<sup>[{i}]</sup></td></tr>" for i in range(400))
+    parts.append("</table>")
+    for _ in range(12):
+        parts.append('<table class="navbox"><tr><th colspan="2">Navigation</th></tr>')
+        parts.extend(f"<tr><td>{word()}</td><td>{' '.join(word() for _ in range(40))}</td></tr>" for _ in range(60))
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def measure(fn, html: str, repeat: int) -> tuple:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(html)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn(html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", default=os.path.join(CACHE_DIR, "fixtures", "wikipedia"))
+    parser.add_argument("--download", action="store_true", help="save the Wikipedia index pages into --fixtures first")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.download:
+        download_fixtures(args.fixtures)
+    pages = {os.path.splitext(os.path.basename(p))[0]: p for p in sorted(glob.glob(os.path.join(args.fixtures, "*.html")))}
+    if pages:
+        fixtures = {}
+        for name, path in pages.items():
+            with open(path, encoding="utf-8") as f:
+                fixtures[name] = f.read()
+    else:
+        print(f"No fixtures in {args.fixtures}; using a synthetic page (run with --download to save real ones).")
+        fixtures = {"synthetic": synthetic_page()}
+
+    print(f"{'page':<10} {'KiB':>6} {'pandas ms':>10} {'stream ms':>10} {'speedup':>8} {'pandas MiB':>11} {'stream MiB':>11}  match")
+    for name, html in fixtures.items():
+        try:
+            p_time, p_peak, p_syms = measure(pandas_extract, html, args.repeat)
+        except Exception as e:  # lxml/bs4 missing or no tables
+            print(f"{name:<10} pandas.read_html failed: {e}")
+            continue
+        s_time, s_peak, s_syms = measure(lambda h: extract_table_symbols(h, max_len=12), html, args.repeat)
+        # read_html renders empty cells as "nan"; the extractor skips them instead
+        match = [s for s in p_syms if s != "NAN"] == s_syms
+        print(f"{name:<10} {len(html) / 1024:6.0f} {p_time * 1000:10.1f} {s_time * 1000:10.1f} {p_time / s_time:7.1f}x "
+              f"{p_peak / 2**20:11.1f} {s_peak / 2**20:11.1f}  {'yes' if match else f'NO ({len(p_syms)} vs {len(s_syms)})'}")
+
+
+if __name__ == "__main__":
+    main()
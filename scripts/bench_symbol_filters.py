@@ -0,0 +1,67 @@
+# scripts/bench_symbol_filters.py
+"""
+Micro-benchmark: compiled SymbolFilter vs the original any()-over-keywords loop.
+Builds a synthetic, seeded list of symbols (plain tickers, preferred-share suffixes,
+ETF/fund names), checks both paths agree, and prints timings.
+
+Usage: python scripts/bench_symbol_filters.py [--count 100000] [--repeat 5]
+"""
+import argparse
+import random
+import string
+import time
+
+from symbol_filters import ETF_KEYWORDS, PREFERRED_KEYWORDS, IMPORT_FILTER
+
+
+def synthetic_symbols(count: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(count):
+        base = "".join(rng.choices(string.ascii_uppercase, k=rng.randint(1, 5)))
+        roll = rng.random()
+        if roll < 0.10:
+            base += rng.choice(PREFERRED_KEYWORDS)
+        elif roll < 0.15:
+            base = f"{base} {rng.choice(ETF_KEYWORDS)}"
+        out.append(base)
+    return out
+
+
+def naive_keep(symbols: list) -> list:
+    """The original per-symbol check from import_symbols.main."""
+    return [
+        st for st in symbols
+        if not any(tok in st for tok in ETF_KEYWORDS) and not any(st.endswith(pk) for pk in PREFERRED_KEYWORDS)
+    ]
+
+
+def best_of(fn, symbols: list, repeat: int) -> tuple:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(symbols)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    symbols = synthetic_symbols(args.count)
+    naive_time, naive_result = best_of(naive_keep, symbols, args.repeat)
+    compiled_time, compiled_result = best_of(IMPORT_FILTER.keep, symbols, args.repeat)
+    if naive_result != compiled_result:
+        raise SystemExit("Mismatch between naive and compiled filters!")
+
+    print(f"{len(symbols)} symbols, {len(compiled_result)} kept (best of {args.repeat})")
+    print(f"naive any() loop : {naive_time * 1000:8.1f} ms")
+    print(f"compiled filter  : {compiled_time * 1000:8.1f} ms")
+    print(f"speedup          : {naive_time / compiled_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
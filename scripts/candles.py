@@ -0,0 +1,112 @@
+# scripts/candles.py
+"""
+Local daily OHLCV candle store and the volume-surge calculation built on it.
+Each symbol's candles live in one compact .npy file (a NumPy structured array, 36 bytes
+per day), so a daily run only has to fetch and append the candles since the last stored
+one instead of re-downloading the whole lookback window.
+Volume surge = latest session's volume / mean volume of the previous `window` sessions.
+"""
+import os
+import time
+import threading
+from typing import Iterable, Optional
+
+import numpy as np
+
+from disk_cache import CACHE_DIR
+
+CANDLE_DIR = os.path.join(CACHE_DIR, "candles")
+CANDLE_DTYPE = np.dtype([("t", "<i8"), ("o", "<f4"), ("h", "<f4"), ("l", "<f4"), ("c", "<f4"), ("v", "<f8")])
+CANDLE_MAX_ROWS = int(os.environ.get("CANDLE_MAX_ROWS", 260))  # about a year of sessions per symbol
+VOLUME_SURGE_WINDOW = int(os.environ.get("VOLUME_SURGE_WINDOW", 20))  # sessions in the rolling average
+
+
+class CandleStore:
+    """Directory of <SYMBOL>.npy files, each sorted by timestamp with no duplicate sessions."""
+
+    def __init__(self, directory: str = CANDLE_DIR, max_rows: int = CANDLE_MAX_ROWS):
+        self.directory = directory
+        self.max_rows = max_rows
+        self.lock = threading.Lock()
+        self.stats = {"appended_rows": 0, "symbols_written": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, symbol: str) -> str:
+        # Class shares (BRK.B) and odd OTC tickers are kept readable but filesystem-safe
+        safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in symbol.upper())
+        return os.path.join(self.directory, f"{safe}.npy")
+
+    def load(self, symbol: str) -> np.ndarray:
+        try:
+            candles = np.load(self._path(symbol), allow_pickle=False)
+        except (OSError, ValueError):
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        return candles if candles.dtype == CANDLE_DTYPE else np.empty(0, dtype=CANDLE_DTYPE)
+
+    def age(self, symbol: str) -> Optional[float]:
+        """Seconds since the symbol's file was last written, or None when nothing is stored."""
+        try:
+            return time.time() - os.path.getmtime(self._path(symbol))
+        except OSError:
+            return None
+
+    def append(self, symbol: str, new: np.ndarray) -> np.ndarray:
+        """Merges new candles (later rows win for the same timestamp), keeps the newest max_rows, writes atomically."""
+        existing = self.load(symbol)
+        merged = np.concatenate([existing, new.astype(CANDLE_DTYPE, copy=False)])
+        # np.unique keeps the first of each timestamp, so search the reversed array to keep the newest row
+        _, last = np.unique(merged["t"][::-1], return_index=True)
+        merged = merged[len(merged) - 1 - last]
+        merged = merged[-self.max_rows:]
+        path = self._path(symbol)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp.npy"
+        np.save(tmp_path, merged, allow_pickle=False)
+        os.replace(tmp_path, path)
+        with self.lock:
+            self.stats["appended_rows"] += len(merged) - len(existing)
+            self.stats["symbols_written"] += 1
+        return merged
+
+    def report(self):
+        print(f"Candle store: {self.stats['symbols_written']} symbols updated, "
+              f"{self.stats['appended_rows']} new sessions appended")
+
+
+def candles_from_finnhub(data: dict) -> np.ndarray:
+    """Converts a Finnhub /stock/candle response ({"s": "ok", "t": [...], "o": [...], ...}) to CANDLE_DTYPE rows."""
+    if not isinstance(data, dict) or data.get("s") != "ok":
+        return np.empty(0, dtype=CANDLE_DTYPE)
+    n = min(len(data.get(field) or []) for field in ("t", "o", "h", "l", "c", "v"))
+    candles = np.empty(n, dtype=CANDLE_DTYPE)
+    for field in ("t", "o", "h", "l", "c", "v"):
+        candles[field] = data[field][:n]
+    return candles
+
+
+def volume_surge_batch(volumes: Iterable[np.ndarray], window: int = VOLUME_SURGE_WINDOW) -> np.ndarray:
+    """
+    Vectorized volume surge for many symbols: each series is right-aligned into one
+    (symbols, window + 1) matrix, NaN-padded where history is short. Symbols with fewer
+    than window // 2 prior sessions, or a zero average, come back as NaN.
+    """
+    volumes = list(volumes)
+    matrix = np.full((len(volumes), window + 1), np.nan)
+    for row, series in enumerate(volumes):
+        tail = np.asarray(series, dtype=float)[-(window + 1):]
+        if len(tail):
+            matrix[row, window + 1 - len(tail):] = tail
+    latest, history = matrix[:, -1], matrix[:, :-1]
+    counts = np.sum(~np.isnan(history), axis=1)
+    sums = np.nansum(history, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / counts
+        surge = latest / means
+    surge[(counts < max(1, window // 2)) | ~(means > 0) | np.isnan(latest)] = np.nan
+    return surge
+
+
+def volume_surge(volumes: np.ndarray, window: int = VOLUME_SURGE_WINDOW) -> Optional[float]:
+    """Single-symbol volume surge, or None when there isn't enough history."""
+    value = volume_surge_batch([volumes], window)[0]
+    return None if np.isnan(value) else float(value)
+
@@ -0,0 +1,102 @@
+# scripts/checkpoint.py
+"""
+Append-only JSONL journal of scored symbols, one file per market session (the last one that closed).
+Every scored symbol is written (and flushed) as soon as its score exists, so a run that
+stops on a 429 or is killed by the Actions timeout leaves behind everything it paid for.
+In sentiment batch mode a symbol is first written with score null (fetched data + headlines,
+sentiment pending) and again once the batch pass has scored it; the later line wins on load.
+A later run against the same session's data can load() the journal and skip those symbols;
+the first run after the next close starts a new file.
+A torn last line from a killed process is ignored on load, and closed off with a newline before the next append.
+"""
+import os
+import json
+import threading
+from datetime import date, datetime, time as clock, timedelta
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+
+from disk_cache import CACHE_DIR
+
+CHECKPOINT_DIR = os.path.join(CACHE_DIR, "checkpoints")
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_CLOSE = clock(16, 0)
+CHECKPOINT_KEEP_DAYS = int(os.environ.get("CHECKPOINT_KEEP_DAYS", 7))
+
+
+def trading_day(now: Optional[datetime] = None) -> date:
+    """The most recent US session that has closed: today after 16:00 New York time, else the weekday before."""
+    local = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    day = local.date()
+    if local.time() < MARKET_CLOSE:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+class CheckpointJournal:
+    """<session day>.jsonl with one {"symbol", "fundamentals", "score"} object per line (score None: sentiment pending)."""
+
+    def __init__(self, directory: str = CHECKPOINT_DIR, day: Optional[date] = None):
+        self.directory = directory
+        self.day = day or trading_day()
+        self.path = os.path.join(directory, f"{self.day.isoformat()}.jsonl")
+        self.lock = threading.Lock()
+        self.written = 0
+        os.makedirs(directory, exist_ok=True)
+        torn = self._ends_mid_line()
+        self.file = open(self.path, "a", encoding="utf-8")
+        if torn:
+            # Close off a line a killed process left half-written, so the next record starts on its own line
+            self.file.write("\n")
+            self.file.flush()
+
+    def _ends_mid_line(self) -> bool:
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return False
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b"\n"
+        except OSError:
+            return False
+
+    def load(self) -> Dict[str, dict]:
+        """symbol -> latest journal entry for this trading day."""
+        entries = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # partial line from an interrupted write
+                    if isinstance(entry, dict) and entry.get("symbol"):
+                        entries[entry["symbol"]] = entry
+        except OSError:
+            pass
+        return entries
+
+    def record(self, symbol: str, fundamentals: dict, score: Optional[float]):
+        line = json.dumps({"symbol": symbol, "fundamentals": fundamentals, "score": score}, default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+            if score is not None:
+                self.written += 1
+
+    def prune(self, keep_days: int = CHECKPOINT_KEEP_DAYS):
+        """Deletes journals for days more than keep_days before this one."""
+        cutoff = (self.day - timedelta(days=keep_days)).isoformat()
+        for name in os.listdir(self.directory):
+            if name.endswith(".jsonl") and name[:-len(".jsonl")] < cutoff:
+                os.remove(os.path.join(self.directory, name))
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+    def report(self):
+        print(f"Checkpoint journal {self.path}: {self.written} symbols recorded this run")
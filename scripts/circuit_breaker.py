@@ -0,0 +1,151 @@
+# scripts/circuit_breaker.py
+"""
+Per-provider circuit breakers.
+closed: calls flow; consecutive transport/5xx failures are counted.
+open: calls are refused (CircuitOpen) until the cooldown ends. A 429 opens the breaker at
+once, for as long as its Retry-After header asks when present. Callers can use delay() to
+wait out a short cooldown instead of being refused.
+half-open: after the cooldown one probe call is let through; success closes the breaker,
+failure reopens it with a doubled cooldown (capped at max_cooldown).
+Each provider trips on its own, so a throttled NewsAPI never stops Finnhub or GROQ work.
+"""
+import os
+import time
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from rate_limiter import RateLimitExhausted
+
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_COOLDOWN = float(os.environ.get("BREAKER_COOLDOWN", 60))  # seconds, when the provider gives no Retry-After
+BREAKER_MAX_COOLDOWN = float(os.environ.get("BREAKER_MAX_COOLDOWN", 3600))
+PROBE_POLL_SECONDS = 0.5  # how often a waiting caller re-checks while another caller's half-open probe is out
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class CircuitOpen(RateLimitExhausted):
+    """Raised instead of calling a provider whose breaker is open (callers treat it like an exhausted bucket)."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """Thread-safe three-state breaker for one provider."""
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 cooldown: float = BREAKER_COOLDOWN, max_cooldown: float = BREAKER_MAX_COOLDOWN):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.open_until = 0.0
+        self.probe_in_flight = False
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def allow(self) -> bool:
+        """True if a call may go out now; in half-open state only one probe at a time is allowed."""
+        if self.delay() == 0.0:
+            return True
+        self.reject()
+        return False
+
+    def delay(self) -> float:
+        """0.0 if a call may go out now (taking the half-open probe), else seconds until it's worth asking again.
+
+        That is the rest of the cooldown while open, or PROBE_POLL_SECONDS while another caller's
+        probe is out. Nothing is counted: a caller that gives up calls reject().
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.state == OPEN and now >= self.open_until:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == CLOSED:
+                return 0.0
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return 0.0
+            if self.state == OPEN:
+                return self.open_until - now
+            return PROBE_POLL_SECONDS
+
+    def reject(self):
+        """Counts one call served without the provider."""
+        with self.lock:
+            self.stats["rejected"] += 1
+
+    def cancel_probe(self):
+        """The allowed call never reached the provider (e.g. no quota left); let another caller probe."""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def _open(self, seconds: float):
+        self.state = OPEN
+        self.open_until = time.monotonic() + seconds
+        self.probe_in_flight = False
+        self.stats["opened"] += 1
+        print(f"[breaker] {self.name} open for {seconds:.0f}s")
+
+    def record_success(self):
+        with self.lock:
+            if self.state == OPEN:
+                return  # a call that started before the breaker opened; the cooldown still stands
+            if self.state != CLOSED:
+                print(f"[breaker] {self.name} closed")
+            self.state = CLOSED
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            self.probe_in_flight = False
+
+    def record_failure(self, retry_after: Optional[float] = None, throttled: bool = False):
+        """Counts a failure; a 429 (throttled) or a failed probe opens the breaker immediately."""
+        with self.lock:
+            if self.state == OPEN:
+                return  # calls that were already in flight when it opened
+            self.failures += 1
+            if not (throttled or self.state == HALF_OPEN or self.failures >= self.failure_threshold):
+                return
+            if retry_after is not None:
+                seconds = min(retry_after, self.max_cooldown)
+            else:
+                if self.state == HALF_OPEN:
+                    self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                seconds = self.cooldown
+            self._open(seconds)
+
+    def report(self) -> str:
+        return (f"[breaker] {self.name}: {self.state}, opened {self.stats['opened']}x, "
+                f"{self.stats['rejected']} calls served without the provider")
+
+
+def build_breakers(providers, cooldowns: Optional[Dict[str, float]] = None) -> Dict[str, CircuitBreaker]:
+    """One breaker per provider; BREAKER_COOLDOWN_<PROVIDER> overrides the default cooldown."""
+    breakers = {}
+    for provider in providers:
+        default = (cooldowns or {}).get(provider, BREAKER_COOLDOWN)
+        cooldown = float(os.environ.get(f"BREAKER_COOLDOWN_{provider.upper()}", default))
+        breakers[provider] = CircuitBreaker(provider, cooldown=cooldown)
+    return breakers
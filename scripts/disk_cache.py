@@ -0,0 +1,114 @@
+# scripts/disk_cache.py
+"""
+Small persistent key/value cache backed by a single SQLite file.
+Entries live in namespaces (e.g. "finnhub"), carry their own expiry time, and the
+file is kept under a byte budget by evicting expired rows first, then the least
+recently used ones. Values are stored as JSON.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Optional
+
+CACHE_DIR = os.environ.get("SCREENER_CACHE_DIR", ".cache")
+DEFAULT_MAX_BYTES = int(float(os.environ.get("SCREENER_CACHE_MAX_MB", 64)) * 1024 * 1024)
+
+
+def make_key(*parts) -> str:
+    """Stable hash of arbitrary JSON-serialisable key parts."""
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """Thread-safe SQLite cache with per-entry TTL and LRU/size-based eviction."""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+        self.missed_keys = set()  # (namespace, key) already counted as a miss by this process
+        self.stale = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " size INTEGER NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+            self.conn.commit()
+
+    def _count(self, counter: dict, namespace: str):
+        counter[namespace] = counter.get(namespace, 0) + 1
+
+    def get(self, namespace: str, key: str, allow_stale: bool = False, count_miss: bool = True) -> Optional[Any]:
+        """Returns the cached value, or None when missing or expired (expired but not yet evicted is fine with allow_stale).
+
+        count_miss=False is for negative caches, where finding nothing is the normal case rather than a miss.
+        Misses are counted once per key per process, so report() shows keys that missed, not lookups.
+        """
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None or (row[1] < now and not allow_stale):
+                # A key looked up again in the same run (a re-request, a fallback) is still one miss
+                if count_miss and (namespace, key) not in self.missed_keys:
+                    self.missed_keys.add((namespace, key))
+                    self._count(self.misses, namespace)
+                return None
+            self.conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?", (now, namespace, key)
+            )
+            self.conn.commit()
+            self._count(self.stale if row[1] < now else self.hits, namespace)
+        return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float):
+        """Stores value for ttl seconds and evicts old entries if the file is over budget."""
+        now = time.time()
+        payload = json.dumps(value, separators=(",", ":"))
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, size, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, payload, len(payload), now + ttl, now),
+            )
+            self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now: float):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% of the budget so we don't evict on every single write
+        target = int(self.max_bytes * 0.9)
+        rows = self.conn.execute(
+            "SELECT namespace, key, size FROM entries ORDER BY (expires_at < ?) DESC, accessed_at ASC", (now,)
+        ).fetchall()
+        doomed = []
+        for namespace, key, size in rows:
+            if total <= target:
+                break
+            doomed.append((namespace, key))
+            total -= size
+        self.conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", doomed)
+
+    def report(self):
+        for namespace in sorted(set(self.hits) | set(self.misses) | set(self.stale)):
+            stale = f" stale={self.stale[namespace]}" if namespace in self.stale else ""
+            print(f"Cache [{namespace}] hits={self.hits.get(namespace, 0)} misses={self.misses.get(namespace, 0)}{stale}")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
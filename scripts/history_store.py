@@ -0,0 +1,166 @@
+# scripts/history_store.py
+"""
+Append-only columnar store of every scored symbol, one row per symbol per run.
+Each column is a raw little-endian NumPy file under .cache/history/ that is appended to
+and read back through np.memmap, so scans only touch the pages they need. Rows are
+appended in run order, which keeps run_ts sorted: a date range is two searchsorted
+calls, and a symbol filter is one vectorized compare on the int32 symbol_id column.
+meta.json holds the committed row count; anything past it (an interrupted append)
+is ignored and truncated on the next write.
+
+Usage: python scripts/history_store.py [SYMBOL ...] [--days 30]
+"""
+import os
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from disk_cache import CACHE_DIR
+
+HISTORY_DIR = os.path.join(CACHE_DIR, "history")
+COLUMNS = {
+    "run_ts": "<i8",  # unix seconds of the run
+    "symbol_id": "<i4",
+    "pe": "<f8",
+    "sentiment": "<f8",
+    "volume_surge_factor": "<f8",
+    "sec_filings_count": "<i4",
+    "score": "<f8",
+}
+VALUE_COLUMNS = ("pe", "sentiment", "volume_surge_factor", "sec_filings_count", "score")
+
+
+class HistoryStore:
+    """Columnar run history; append_run() buffers rows, flush() writes them and commits the new row count."""
+
+    def __init__(self, directory: str = HISTORY_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.pending = []
+        os.makedirs(directory, exist_ok=True)
+        self.symbol_ids = self._load_json("symbols.json", {})
+        self.symbols = {i: s for s, i in self.symbol_ids.items()}
+        self.rows = int(self._load_json("meta.json", {}).get("rows", 0))
+
+    # --- files ---
+    def _file(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load_json(self, name: str, default):
+        try:
+            with open(self._file(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def _write_json(self, name: str, value):
+        tmp_path = self._file(f"{name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, self._file(name))
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only memmap of the committed part of one column."""
+        dtype = np.dtype(COLUMNS[name])
+        if self.rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._file(f"{name}.col"), dtype=dtype, mode="r", shape=(self.rows,))
+
+    # --- writing ---
+    def _symbol_id(self, symbol: str) -> int:
+        if symbol not in self.symbol_ids:
+            self.symbol_ids[symbol] = len(self.symbol_ids)
+            self.symbols[self.symbol_ids[symbol]] = symbol
+        return self.symbol_ids[symbol]
+
+    def append_run(self, rows: Iterable[dict], run_ts: Optional[float] = None):
+        """Buffers one run's rows ({"symbol", "pe", "sentiment", ...}); missing values are stored as NaN / 0."""
+        run_ts = int(run_ts if run_ts is not None else time.time())
+        with self.lock:
+            for row in rows:
+                self.pending.append((run_ts, self._symbol_id(row["symbol"]),
+                                     *(row.get(name) for name in VALUE_COLUMNS)))
+
+    def flush(self) -> int:
+        """Appends buffered rows to every column file, then commits; returns the number of rows written."""
+        with self.lock:
+            if not self.pending:
+                return 0
+            pending, self.pending = self.pending, []
+            fields = list(zip(*pending))
+            for index, (name, dtype) in enumerate(COLUMNS.items()):
+                values = [np.nan if v is None else v for v in fields[index]]
+                if np.dtype(dtype).kind == "i":
+                    values = [0 if isinstance(v, float) and np.isnan(v) else int(v) for v in values]
+                array = np.asarray(values, dtype=dtype)
+                with open(self._file(f"{name}.col"), "ab") as f:
+                    f.truncate(self.rows * array.itemsize)  # drop rows from an append that never committed
+                    f.seek(self.rows * array.itemsize)
+                    array.tofile(f)
+            # Symbols first: a committed row must never point at an unknown symbol_id
+            self._write_json("symbols.json", self.symbol_ids)
+            self.rows += len(pending)
+            self._write_json("meta.json", {"rows": self.rows, "updated_at": time.time()})
+            return len(pending)
+
+    # --- reading ---
+    def scan(self, symbols: Optional[Iterable[str]] = None, start: Optional[float] = None,
+             end: Optional[float] = None, columns: Iterable[str] = VALUE_COLUMNS) -> Dict[str, np.ndarray]:
+        """Rows with start <= run_ts < end for the given symbols (all when None), as {column: array}."""
+        run_ts = self.column("run_ts")
+        lo = int(np.searchsorted(run_ts, start, side="left")) if start is not None else 0
+        hi = int(np.searchsorted(run_ts, end, side="left")) if end is not None else self.rows
+        ids = self.column("symbol_id")[lo:hi]
+        if symbols is not None:
+            wanted = [self.symbol_ids[s] for s in symbols if s in self.symbol_ids]
+            mask = np.isin(ids, wanted)
+        else:
+            mask = np.ones(len(ids), dtype=bool)
+        result = {"run_ts": np.asarray(run_ts[lo:hi][mask]), "symbol_id": np.asarray(ids[mask])}
+        for name in columns:
+            result[name] = np.asarray(self.column(name)[lo:hi][mask])
+        return result
+
+    def last_seen(self, symbols: Iterable[str]) -> Dict[str, int]:
+        """run_ts of each symbol's most recent row; symbols never stored are left out."""
+        ids = np.asarray(self.column("symbol_id"))
+        run_ts = self.column("run_ts")
+        # First occurrence in the reversed column = last row for that id
+        unique_ids, reversed_index = np.unique(ids[::-1], return_index=True)
+        last_row = dict(zip(unique_ids.tolist(), (len(ids) - 1 - reversed_index).tolist()))
+        seen = {}
+        for symbol in symbols:
+            row = last_row.get(self.symbol_ids.get(symbol))
+            if row is not None:
+                seen[symbol] = int(run_ts[row])
+        return seen
+
+    def report(self):
+        print(f"History store: {self.rows} rows for {len(self.symbol_ids)} symbols in {self.directory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print stored screener history.")
+    parser.add_argument("symbols", nargs="*", help="symbols to show (default: all)")
+    parser.add_argument("--days", type=float, default=30, help="how far back to scan")
+    args = parser.parse_args()
+
+    store = HistoryStore()
+    started = time.perf_counter()
+    rows = store.scan([s.upper() for s in args.symbols] or None, start=time.time() - args.days * 86400)
+    elapsed = time.perf_counter() - started
+    print(f"{'run (UTC)':<17} {'symbol':<8} " + " ".join(f"{name[:12]:>12}" for name in VALUE_COLUMNS))
+    for i in range(len(rows["run_ts"])):
+        when = datetime.fromtimestamp(int(rows["run_ts"][i]), tz=timezone.utc).strftime("%Y-%m-%d %H:%M")
+        print(f"{when:<17} {store.symbols[int(rows['symbol_id'][i])]:<8} "
+              + " ".join(f"{rows[name][i]:12.3f}" for name in VALUE_COLUMNS))
+    print(f"{len(rows['run_ts'])} of {store.rows} rows scanned in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# scripts/html_tables.py
+"""
+Purpose-built symbol extractor for HTML tables (Wikipedia index pages, OTC screeners).
+Instead of pandas.read_html building a DataFrame for every table on the page, the HTML
+is fed to html.parser in chunks; only the cells of header-matching columns (plus the
+first column of the first table, as a fallback) are kept, and parsing stops at the end
+of the first table whose symbol/ticker column yields any symbols.
+Follows read_html conventions where they matter here: <thead>/leading all-<th> rows form
+the header, colspan/rowspan cells are repeated, and display:none elements are skipped.
+"""
+import re
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional, Union
+
+SYMBOL_COLUMN_CANDIDATES = ("symbol", "ticker", "ticker symbol", "ticker(s)", "code")
+CHUNK_SIZE = 64 * 1024
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+SKIPPED_TEXT_TAGS = {"style", "script"}
+FIRST_TABLE = re.compile(r"<table[\s>]", re.IGNORECASE)
+
+
+def clean_symbol(value: str) -> str:
+    """Same cleanup as the pandas path: first token, footnote markers like "[1]" removed, upper-cased."""
+    return value.split()[0].split('[')[0].strip().upper()
+
+
+class _Finished(Exception):
+    """Raised from a handler to stop parsing once a table produced symbols."""
+
+
+class _TableState:
+    def __init__(self, index: int):
+        self.index = index
+        self.in_thead = False
+        self.header_rows = []  # list of {col: text}
+        self.body_started = False
+        self.wanted = None  # [(candidate, col)] once the header is known
+        self.values = {}  # col -> [text]
+        self.first_column = []
+        self.spans = {}  # col -> [rows_left, text]
+        self.row = None  # {col: text} for the row being parsed
+        self.row_has_td = False
+        self.col = 0
+        self.cell = None  # [text parts] for the cell being parsed
+        self.cell_colspan = 1
+        self.cell_rowspan = 1
+
+
+class SymbolTableParser(HTMLParser):
+    def __init__(self, candidates=SYMBOL_COLUMN_CANDIDATES, max_len: Optional[int] = None):
+        super().__init__(convert_charrefs=True)
+        self.candidates = candidates
+        self.max_len = max_len
+        self.tables = []  # stack of _TableState (nested tables)
+        self.table_count = 0
+        self.fallback = None  # first column of the first table
+        self.result = None
+        self.hidden = []  # open tags inside a display:none element
+        self.skipped_text = 0
+
+    # --- helpers ---
+    def _symbols(self, values: List[str]) -> List[str]:
+        syms = [clean_symbol(v) for v in values if v and v.strip()]
+        return [s for s in syms if s and (self.max_len is None or len(s) <= self.max_len)]
+
+    def _resolve_header(self, table: _TableState):
+        columns = {}
+        for row in table.header_rows:
+            for col, text in row.items():
+                columns.setdefault(col, []).append(text)
+        names = {col: " ".join(parts).lower() for col, parts in columns.items()}
+        table.wanted = [(cand, col) for cand in self.candidates for col in sorted(names) if cand in names[col]]
+        for _, col in table.wanted:
+            table.values.setdefault(col, [])
+
+    def _finish_cell(self, table: _TableState):
+        text = " ".join("".join(table.cell).split())
+        # Skip columns still occupied by rowspans from previous rows
+        while table.col in table.spans and table.col not in table.row:
+            span = table.spans[table.col]
+            table.row[table.col] = span[1]
+            span[0] -= 1
+            if span[0] <= 0:
+                del table.spans[table.col]
+            table.col += 1
+        for offset in range(table.cell_colspan):
+            table.row[table.col + offset] = text
+            if table.cell_rowspan > 1:
+                table.spans[table.col + offset] = [table.cell_rowspan - 1, text]
+        table.col += table.cell_colspan
+        table.cell = None
+
+    def _finish_row(self, table: _TableState):
+        if table.cell is not None:
+            self._finish_cell(table)
+        row = table.row
+        # Cells still covered by a rowspan from above are filled in after the row's own cells
+        for col, span in list(table.spans.items()):
+            if col not in row:
+                row[col] = span[1]
+                span[0] -= 1
+                if span[0] <= 0:
+                    del table.spans[col]
+        is_header = table.in_thead or (not table.body_started and not table.row_has_td)
+        if is_header and not table.body_started:
+            table.header_rows.append(row)
+        else:
+            if table.wanted is None:
+                self._resolve_header(table)
+            table.body_started = True
+            for col in table.values:
+                if col in row:
+                    table.values[col].append(row[col])
+            if table.index == 0 and 0 in row:
+                table.first_column.append(row[0])
+        table.row = None
+
+    def _finish_table(self, table: _TableState):
+        if table.wanted is None:
+            self._resolve_header(table)
+        if table.index == 0:
+            # Same fallback as the read_html path: first column of the first table
+            self.fallback = table.first_column
+        for _, col in table.wanted:
+            syms = self._symbols(table.values[col])
+            if syms:
+                self.result = syms
+                raise _Finished()
+
+    # --- HTMLParser callbacks ---
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self.hidden:
+            if tag not in VOID_TAGS:
+                self.hidden.append(tag)
+            return
+        style = (attrs.get("style") or "").replace(" ", "").lower()
+        if "display:none" in style:
+            if tag not in VOID_TAGS:
+                self.hidden.append(tag)
+            return
+        if tag in SKIPPED_TEXT_TAGS:
+            self.skipped_text += 1
+            return
+
+        if tag == "table":
+            self.tables.append(_TableState(self.table_count))
+            self.table_count += 1
+            return
+        if not self.tables:
+            return
+        table = self.tables[-1]
+        if tag == "thead":
+            table.in_thead = True
+        elif tag == "tr":
+            if table.row is not None:
+                self._finish_row(table)
+            table.row, table.row_has_td, table.col = {}, False, 0
+        elif tag in ("td", "th"):
+            if table.row is None:
+                table.row, table.row_has_td, table.col = {}, False, 0
+            elif table.cell is not None:
+                self._finish_cell(table)  # previous cell's end tag was omitted
+            table.cell = []
+            table.row_has_td = table.row_has_td or tag == "td"
+            table.cell_colspan = _span(attrs["colspan"]) if "colspan" in attrs else 1
+            table.cell_rowspan = _span(attrs["rowspan"]) if "rowspan" in attrs else 1
+        elif tag == "br" and table.cell is not None:
+            table.cell.append(" ")
+
+    def handle_endtag(self, tag):
+        if self.hidden:
+            if self.hidden[-1] == tag:
+                self.hidden.pop()
+            return
+        if tag in SKIPPED_TEXT_TAGS:
+            self.skipped_text = max(0, self.skipped_text - 1)
+            return
+        if not self.tables:
+            return
+        table = self.tables[-1]
+        if tag in ("td", "th") and table.cell is not None:
+            self._finish_cell(table)
+        elif tag == "tr" and table.row is not None:
+            self._finish_row(table)
+        elif tag == "thead":
+            if table.row is not None:
+                self._finish_row(table)
+            table.in_thead = False
+        elif tag == "table":
+            if table.row is not None:
+                self._finish_row(table)
+            self.tables.pop()
+            self._finish_table(table)
+
+    def handle_data(self, data):
+        if self.hidden or self.skipped_text or not self.tables:
+            return
+        table = self.tables[-1]
+        if table.cell is not None:
+            table.cell.append(data)
+
+
+def _span(value) -> int:
+    try:
+        return max(1, int(str(value).strip().rstrip(";")))
+    except (TypeError, ValueError):
+        return 1
+
+
+def extract_table_symbols(html: Union[str, Iterable[str]], candidates=SYMBOL_COLUMN_CANDIDATES,
+                          max_len: Optional[int] = None) -> List[str]:
+    """
+    Symbols from the first table with a non-empty column whose header contains a candidate
+    (candidates tried in order), else the first column of the first table, else [].
+    `html` may be a string (fed in CHUNK_SIZE pieces from its first <table>) or any iterable of text chunks.
+    """
+    if isinstance(html, str):
+        # Nothing before the first <table> (head, scripts, lead prose) can matter, so don't tokenize it
+        first = FIRST_TABLE.search(html)
+        start = first.start() if first else len(html)
+        chunks = (html[i:i + CHUNK_SIZE] for i in range(start, len(html), CHUNK_SIZE))
+    else:
+        chunks = html
+    parser = SymbolTableParser(candidates, max_len)
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.close()
+    except _Finished:
+        return parser.result
+    if parser.fallback is not None:
+        return parser._symbols(parser.fallback)
+    return []
@@ -0,0 +1,149 @@
+# scripts/http_cache.py
+"""
+Conditional-GET cache for symbol source downloads.
+Each URL's body is stored on disk next to its ETag/Last-Modified validators; later
+requests send If-None-Match/If-Modified-Since and a 304 serves the cached copy.
+A cached body older than max_staleness is never revalidated: it is downloaded again.
+A 304 counts as a fresh fetch, so an unchanged source keeps being revalidated rather than re-downloaded.
+iter_lines() is the streaming variant: lines are yielded while the body downloads and
+are teed into the cache file, so memory stays flat regardless of file size.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Iterator, Optional
+
+from disk_cache import CACHE_DIR
+
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "http")
+HTTP_CACHE_MAX_STALENESS = float(os.environ.get("HTTP_CACHE_MAX_STALENESS", 7 * 86400))
+
+
+class ConditionalHTTPCache:
+    """Directory of <sha>.body files plus <sha>.json metadata (url, etag, last_modified, fetched_at)."""
+
+    def __init__(self, directory: str = HTTP_CACHE_DIR, max_staleness: float = HTTP_CACHE_MAX_STALENESS):
+        self.directory = directory
+        self.max_staleness = max_staleness
+        self.lock = threading.Lock()
+        self.stats = {"not_modified": 0, "downloaded": 0, "bytes_downloaded": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url: str) -> tuple:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, digest)
+        return base + ".body", base + ".json"
+
+    def _count(self, field: str, amount: int = 1):
+        with self.lock:
+            self.stats[field] += amount
+
+    def load_meta(self, url: str) -> Optional[dict]:
+        """Metadata for a usable cached copy of url, or None when missing or too stale to revalidate."""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(body_path) or time.time() - meta.get("fetched_at", 0) > self.max_staleness:
+            return None
+        return meta
+
+    def validator_headers(self, meta: Optional[dict]) -> dict:
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def read_body(self, url: str) -> str:
+        with open(self._paths(url)[0], encoding="utf-8") as f:
+            return f.read()
+
+    def _write_atomic(self, path: str, content: str):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _store_meta(self, url: str, etag: Optional[str], last_modified: Optional[str]):
+        meta = {"url": url, "etag": etag, "last_modified": last_modified, "fetched_at": time.time()}
+        self._write_atomic(self._paths(url)[1], json.dumps(meta))
+
+    def refresh(self, url: str, meta: dict, response):
+        """After a 304: the server just confirmed the copy, so restart its age and take any validators it resent."""
+        self._store_meta(url, response.headers.get("ETag") or meta.get("etag"),
+                         response.headers.get("Last-Modified") or meta.get("last_modified"))
+
+    def store(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str]):
+        """Writes body then metadata, each via rename, so readers never see a half-written entry."""
+        if not etag and not last_modified:
+            return  # nothing to revalidate with, so caching the body would never pay off
+        self._write_atomic(self._paths(url)[0], text)
+        self._store_meta(url, etag, last_modified)
+
+    def get_text(self, session, url: str, headers: Optional[dict] = None, timeout: float = 20) -> str:
+        """GETs url with validators when a fresh-enough copy exists; a 304 returns the cached body."""
+        meta = self.load_meta(url)
+        r = session.get(url, headers={**(headers or {}), **self.validator_headers(meta)}, timeout=timeout)
+        if r.status_code == 304 and meta:
+            self._count("not_modified")
+            text = self.read_body(url)
+            self.refresh(url, meta, r)
+            return text
+        r.raise_for_status()
+        text = r.text
+        self._count("downloaded")
+        self._count("bytes_downloaded", len(r.content))
+        self.store(url, text, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+        return text
+
+    def iter_lines(self, session, url: str, headers: Optional[dict] = None, timeout: float = 20) -> Iterator[str]:
+        """Streaming get_text: yields lines (without line endings) as they arrive or from the cached copy on a 304."""
+        meta = self.load_meta(url)
+        body_path = self._paths(url)[0]
+        r = session.get(url, headers={**(headers or {}), **self.validator_headers(meta)}, timeout=timeout, stream=True)
+        with r:
+            if r.status_code == 304 and meta:
+                self._count("not_modified")
+                self.refresh(url, meta, r)
+                with open(body_path, encoding="utf-8") as f:
+                    for line in f:
+                        yield line.rstrip("\r\n")
+                return
+
+            r.raise_for_status()
+            etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+            r.encoding = r.encoding or "utf-8"
+            self._count("downloaded")
+
+            if not etag and not last_modified:
+                for line in r.iter_lines(decode_unicode=True):
+                    self._count("bytes_downloaded", len(line) + 1)
+                    yield line
+                return
+
+            # Tee into a temp file; it only replaces the cached body once the whole stream was consumed
+            tmp_path = f"{body_path}.{threading.get_ident()}.tmp"
+            completed = False
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as out:
+                    for line in r.iter_lines(decode_unicode=True):
+                        self._count("bytes_downloaded", len(line) + 1)
+                        out.write(line + "\n")
+                        yield line
+                completed = True
+            finally:
+                if completed:
+                    os.replace(tmp_path, body_path)
+                    self._store_meta(url, etag, last_modified)
+                elif os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def report(self):
+        print(f"HTTP cache: {self.stats['not_modified']} not modified (served from cache), "
+              f"{self.stats['downloaded']} downloaded ({self.stats['bytes_downloaded'] / 1024:.0f} KiB)")
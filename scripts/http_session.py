@@ -0,0 +1,60 @@
+# scripts/http_session.py
+"""
+Shared requests.Session with keep-alive connection pools and mounted retry adapters.
+Both run_screener.py and import_symbols.py go through get_session() so repeated calls
+to the same few hosts reuse TCP+TLS connections instead of handshaking every time.
+The screener passes provider_budgeted=True: only connection failures are retried in the
+adapter, since a re-sent request would bypass its token bucket, daily quota and breaker.
+"""
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# ---------------------------
+# Tunables
+# ---------------------------
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 10))  # distinct hosts kept warm
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 16))  # keep-alive connections per host
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 2))  # transport-level retries (connect/read/5xx)
+HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5))
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_sessions = {}
+_session_lock = threading.Lock()
+
+
+def build_session(pool_connections: int = HTTP_POOL_CONNECTIONS, pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                  max_retries: int = HTTP_MAX_RETRIES, backoff_factor: float = HTTP_BACKOFF_FACTOR,
+                  provider_budgeted: bool = False) -> requests.Session:
+    """
+    Creates a session whose http/https adapters pool connections per host and retry transient failures.
+    With provider_budgeted, read errors and 5xx responses are left to the caller (which retries
+    through its rate limiter); only connects that never reached the server are retried here.
+    """
+    # 429 is deliberately not retried here: callers handle provider limits themselves.
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=0 if provider_budgeted else max_retries,
+        status=0 if provider_budgeted else max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=() if provider_budgeted else RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          max_retries=retry, pool_block=False)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(provider_budgeted: bool = False) -> requests.Session:
+    """Returns the process-wide session of that kind, creating it on first use."""
+    with _session_lock:
+        if provider_budgeted not in _sessions:
+            _sessions[provider_budgeted] = build_session(provider_budgeted=provider_budgeted)
+        return _sessions[provider_budgeted]
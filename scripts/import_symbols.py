@@ -35,11 +35,18 @@ import io
 import csv 
 import time 
 import traceback 
-import requests 
 import os 
-from typing import List, Optional 
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterable, Iterator, List, Optional 
 import pandas as pd 
 from supabase import create_client
+from rate_limiter import RateLimiter, load_limits
+from http_session import get_session
+from http_cache import ConditionalHTTPCache
+from symbol_filters import IMPORT_FILTER
+from html_tables import extract_table_symbols
+from batch_writer import write_pipelined
 
 # --------------------------- 
 # Environment / config 
@@ -67,11 +74,28 @@ supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 # ---------------------------
 RETRY_ATTEMPTS = 3 
 RETRY_DELAY = 2 
-BATCH_SIZE = 500 
-ETF_KEYWORDS = ["ETF", "ETN", "FUND", "TRUST", "INDEX", "EXCHANGE TRADED"]
+BATCH_SIZE = 500  # starting rows per upsert; batch_writer adapts it (UPSERT_MAX_ROWS / UPSERT_MAX_BYTES / UPSERT_MAX_IN_FLIGHT)
+SOURCE_WORKERS = int(os.environ.get("IMPORT_SOURCE_WORKERS", 6))  # sources fetched at once
+SOURCE_TIMEOUT = float(os.environ.get("IMPORT_SOURCE_TIMEOUT", 180))  # seconds per source from its start, retries included
+REQUEST_TIMEOUT = 20  # per-request socket timeout, cut down to what's left of SOURCE_TIMEOUT
+# "delta" (default) only inserts new symbols and marks dropped ones; "full" re-upserts everything like before
+SYMBOLS_UPSERT_MODE = os.environ.get("SYMBOLS_UPSERT_MODE", "delta").lower()
+SYMBOLS_PAGE_SIZE = 1000  # PostgREST's default max rows per select
+SYMBOLS_FILTER_CHUNK = 200  # symbols per .in_() filter, keeps the request URL short
+# Refuse to mark more than this fraction of imported symbols as removed in one run (a source silently came back short)
+MAX_REMOVED_FRACTION = float(os.environ.get("SYMBOLS_MAX_REMOVED_FRACTION", 0.1))
+IMPORT_SOURCE = "hybrid-import"
+REMOVED_SOURCE = "hybrid-import:removed"
+# ETF_KEYWORDS / PREFERRED_KEYWORDS live in symbol_filters.py and are compiled once into IMPORT_FILTER
 
-# Keywords for filtering out Preferred Stocks.
-PREFERRED_KEYWORDS = ["-P", ".P", "/P", " PR", " A", " B", " Q", "PF", "PG", "PH", "PI", "PJ", "PK", "PL", "PM", "PN", "PO", "PQ", "PS", "PT", "PU", "PV", "PW", "PX", "PY", "PZ"]
+# Keep-alive session shared by every fetch (pool sizes via HTTP_POOL_CONNECTIONS / HTTP_POOL_MAXSIZE)
+HTTP_SESSION = get_session()
+
+# Bodies + ETag/Last-Modified per URL; unchanged sources come back as 304 (max age via HTTP_CACHE_MAX_STALENESS)
+HTTP_CACHE = ConditionalHTTPCache()
+
+# Symbol sources are unthrottled unless RATE_LIMIT_SYMBOL_SOURCES (e.g. "30/min") is set
+RATE_LIMITER = RateLimiter(load_limits({}))
 
 REQUEST_HEADERS = { 
     "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) " 
@@ -117,11 +141,35 @@ OTC_SOURCES_CSV = [
     "https://raw.githubusercontent.com/codebox/otc-markets-symbols/master/otc_symbols.csv", 
 ]
 
-# Some OTC pages serve tables (HTML) instead of CSV; we can parse via pandas as a fallback
+# Some OTC pages serve tables (HTML) instead of CSV; we can parse them with the table extractor as a fallback
 OTC_SOURCES_HTML = [ 
     "https://www.otcmarkets.com/stock-screener", # page has table; scraping is best-effort 
 ]
 
+# --------------------------- 
+# Source deadline (set per worker thread by fetch_sources_concurrently) 
+# ---------------------------
+class SourceDeadlineExceeded(Exception):
+    """The source's deadline passed: no further request or retry is started."""
+
+_source_deadline = threading.local()
+
+def request_timeout(default: float = REQUEST_TIMEOUT) -> float:
+    """default, capped at the time left before this thread's source deadline (if any); raises once it has passed."""
+    deadline = getattr(_source_deadline, "at", None)
+    if deadline is None:
+        return default
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise SourceDeadlineExceeded("source deadline passed")
+    return min(default, left)
+
+def lines_before_deadline(lines: Iterable[str]) -> Iterator[str]:
+    """Passes lines through, raising SourceDeadlineExceeded if the deadline passes mid-stream."""
+    for line in lines:
+        request_timeout()
+        yield line
+
 # --------------------------- 
 # HTTP helper with retries 
 # ---------------------------
@@ -129,9 +177,11 @@ def safe_get_text(url: str, retries: int = RETRY_ATTEMPTS, delay: int = RETRY_DE
     last_exc = None 
     for attempt in range(1, retries + 1): 
         try: 
-            r = requests.get(url, headers=REQUEST_HEADERS, timeout=20) 
-            r.raise_for_status() 
-            return r.text 
+            with RATE_LIMITER.request("symbol_sources"): 
+                return HTTP_CACHE.get_text(HTTP_SESSION, url, headers=REQUEST_HEADERS, timeout=request_timeout()) 
+        except SourceDeadlineExceeded as e: 
+            last_exc = e 
+            break 
         except Exception as e: 
             last_exc = e 
             print(f"[{attempt}/{retries}] GET {url} failed: {e}") 
@@ -142,25 +192,32 @@ def safe_get_text(url: str, retries: int = RETRY_ATTEMPTS, delay: int = RETRY_DE
 # --------------------------- 
 # Parsers 
 # ---------------------------
-def parse_nasdaq_txt(text: str) -> List[str]: 
-    out = [] 
-    lines = text.splitlines() 
-    if not lines: 
-        return out 
-    header = lines[0].split("|") 
-    try: 
-        idx = header.index("Symbol") 
-    except ValueError: 
-        idx = 0 
-    for line in lines[1:]: 
+def iter_nasdaq_symbols(lines: Iterable[str]) -> Iterator[str]: 
+    """
+    Streams symbols out of a pipe-delimited nasdaqtrader directory file (nasdaqlisted.txt:
+    "Symbol|Security Name|...", otherlisted.txt: "ACT Symbol|Security Name|..."), skipping
+    the "File Creation Time" trailer. Works on any line iterator, including a live HTTP stream.
+    """
+    idx = None 
+    for line in lines: 
+        if idx is None: 
+            header = line.split("|") 
+            try: 
+                idx = header.index("Symbol") 
+            except ValueError: 
+                idx = 0 
+            continue 
         if not line or line.startswith("File Creation"): 
             continue 
         parts = line.split("|") 
         if len(parts) > idx: 
             sym = parts[idx].strip().upper() 
             if sym and sym != "SYMBOL": 
-                out.append(sym) 
-    return out
+                yield sym
+
+def parse_nasdaq_txt(text: str) -> List[str]: 
+    # Iterate the text in place instead of materialising a splitlines() copy
+    return list(iter_nasdaq_symbols(line.rstrip("\r\n") for line in io.StringIO(text)))
 
 def parse_csv_symbols(text: str, candidate_cols=("Symbol","symbol","Ticker","ticker","code")) -> List[str]: 
     out = [] 
@@ -180,25 +237,9 @@ def parse_csv_symbols(text: str, candidate_cols=("Symbol","symbol","Ticker","tic
     return out
 
 def parse_html_table_symbols(html: str) -> List[str]: 
-    # Try pandas.read_html wrapped in StringIO 
+    # Streaming table extractor: stops after the first table with a symbol/ticker column 
     try: 
-        tables = pd.read_html(io.StringIO(html)) 
-        for df in tables: 
-            cols = [str(c).lower() for c in df.columns] 
-            for candidate in ("symbol","ticker","ticker symbol","ticker(s)","code"): 
-                if any(candidate in c for c in cols): 
-                    # choose best matching column 
-                    for c in df.columns: 
-                        if candidate in str(c).lower(): 
-                            vals = df[c].astype(str).tolist() 
-                            syms = [v.split()[0].split('[')[0].strip().upper() for v in vals if v and str(v).strip() != ""] 
-                            return [s for s in syms if s] 
-        # fallback: try first column 
-        if tables: 
-            first = tables[0] 
-            vals = first.iloc[:,0].astype(str).tolist() 
-            syms = [v.split()[0].split('[')[0].strip().upper() for v in vals if v and str(v).strip() != ""] 
-            return [s for s in syms if s] 
+        return extract_table_symbols(html) 
     except Exception as e: 
         print("parse_html_table_symbols failed:", e) 
     return []
@@ -234,36 +275,16 @@ def fetch_otc_symbols() -> List[str]:
     return list(dict.fromkeys(symbols))
 
 # --------------------------- 
-# Wikipedia fetch / parser using pandas.read_html with StringIO 
+# Wikipedia fetch / parser using the streaming table extractor 
 # ---------------------------
 def fetch_symbols_from_wikipedia(url: str) -> List[str]: 
     html = safe_get_text(url) 
     if not html: 
         return [] 
     try: 
-        tables = pd.read_html(io.StringIO(html)) 
-        for df in tables: 
-            cols = [str(c).lower() for c in df.columns] 
-            for candidate in ("symbol","ticker","ticker symbol","ticker(s)","code"): 
-                if any(candidate in c for c in cols): 
-                    # pick matching column 
-                    for c in df.columns: 
-                        if candidate in str(c).lower(): 
-                            try: 
-                                vals = df[c].astype(str).tolist() 
-                                syms = [v.split()[0].split('[')[0].strip().upper() for v in vals if v and str(v).strip() != ""] 
-                                syms = [s for s in syms if s and len(s) <= 12] 
-                                if syms: 
-                                    return syms 
-                            except Exception: 
-                                continue 
-        # fallback: first column 
-        first = tables[0] 
-        vals = first.iloc[:,0].astype(str).tolist() 
-        syms = [v.split()[0].split('[')[0].strip().upper() for v in vals if v and str(v).strip() != ""] 
-        return [s for s in syms if s and len(s) <= 12] 
+        return extract_table_symbols(html, max_len=12) 
     except Exception as e: 
-        print(f"pandas.read_html failed for {url}: {e}") 
+        print(f"Table extraction failed for {url}: {e}") 
         return []
 
 # --------------------------- 
@@ -280,22 +301,212 @@ def fetch_russell_with_fallback(wiki_url: str, mirrors: List[str], expected_min:
             if parsed: 
                 print(f"Russell fallback: fetched {len(parsed)} from {m}") 
                 return parsed 
+    if syms:
+        # A handful of rows means the table didn't parse; don't pass it off as the index
+        raise RuntimeError(f"Russell: only {len(syms)} symbols from {wiki_url} and no mirror answered")
     return syms
 
+# --------------------------- 
+# Exchange directory fetcher + concurrent source runner 
+# ---------------------------
+def stream_nasdaq_symbols(url: str) -> Iterator[str]:
+    """Yields symbols while the directory file downloads (one attempt; a broken stream raises)."""
+    with RATE_LIMITER.request("symbol_sources"):
+        lines = HTTP_CACHE.iter_lines(HTTP_SESSION, url, headers=REQUEST_HEADERS, timeout=request_timeout())
+        yield from iter_nasdaq_symbols(lines_before_deadline(lines))
+
+def fetch_exchange_file(url: str, retries: int = RETRY_ATTEMPTS, delay: int = RETRY_DELAY) -> List[str]:
+    """
+    The whole directory file or an exception. A stream that breaks midway is thrown away and
+    restarted; a short list is never returned as a success, since delta sync would treat the
+    missing symbols as delisted.
+    """
+    last_exc = None
+    for attempt in range(1, retries + 1):
+        try:
+            return list(stream_nasdaq_symbols(url))
+        except SourceDeadlineExceeded:
+            raise
+        except Exception as e:
+            last_exc = e
+            print(f"[{attempt}/{retries}] stream {url} failed: {e}")
+            if attempt < retries:
+                time.sleep(delay)
+    raise RuntimeError(f"All attempts failed for {url}: {last_exc}") from last_exc
+
+# name -> (label, fetcher). Names are also what gets recorded in failed_sources.
+SYMBOL_SOURCES = {
+    "sp500": ("S&P500", lambda: fetch_symbols_from_wikipedia(WIKI_SP500)),
+    "sp400": ("S&P400", lambda: fetch_symbols_from_wikipedia(WIKI_SP400)),
+    "sp600": ("S&P600", lambda: fetch_symbols_from_wikipedia(WIKI_SP600)),
+    "r1000": ("Russell1000", lambda: fetch_russell_with_fallback(WIKI_R1000, RUSSELL1000_MIRRORS, expected_min=900)),
+    "r2000": ("Russell2000", lambda: fetch_russell_with_fallback(WIKI_R2000, RUSSELL2000_MIRRORS, expected_min=1800)),
+    "r3000": ("Russell3000", lambda: fetch_russell_with_fallback(WIKI_R3000, RUSSELL3000_MIRRORS, expected_min=2500)),
+    "djia": ("DJIA", lambda: fetch_symbols_from_wikipedia(WIKI_DJIA)),
+    "otc": ("OTC symbols fetched", fetch_otc_symbols),
+    "nasdaqlisted": ("NASDAQ listed (best-effort)", lambda: fetch_exchange_file(NASDAQTXT_HTTP)),
+    "otherlisted": ("Other listed (best-effort)", lambda: fetch_exchange_file(OTHERLISTED_HTTP)),
+}
+
+def fetch_sources_concurrently(sources: dict, workers: int = SOURCE_WORKERS, timeout: float = SOURCE_TIMEOUT):
+    """
+    Runs every source fetcher on a bounded pool. Returns ({name: symbols}, failed_names).
+    Each source gets its own deadline, timeout seconds from when a worker starts it (time
+    spent queued behind other sources doesn't count): every request is given at most the
+    time left, and no request or retry starts after it, so the worker winds down by then too.
+    A download already in progress can overrun by one socket timeout at most (REQUEST_TIMEOUT).
+    A source that raises, returns no symbols (the Wikipedia/mirror fetchers return [] when a
+    download fails) or is still running past its deadline is reported as failed; results are
+    keyed by name so the merge order never changes.
+    """
+    results = {name: [] for name in sources}
+    failed = []
+    deadlines = {}
+
+    def run(name, fetcher):
+        _source_deadline.at = deadlines[name] = time.monotonic() + timeout
+        try:
+            return fetcher()
+        finally:
+            _source_deadline.at = None
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    futures = {executor.submit(run, name, fetcher): name for name, (_, fetcher) in sources.items()}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    results[name] = future.result() or []
+                    print(f"{sources[name][0]}: {len(results[name])}")
+                    if not results[name]:
+                        print(f"Source {name} returned no symbols")
+                        failed.append(name)
+                except Exception as e:
+                    print(f"Source {name} failed: {e}")
+                    failed.append(name)
+            now = time.monotonic()
+            for future in list(pending):
+                name = futures[future]
+                # Past its deadline (plus one socket timeout for a read already in flight): move on without it
+                if name in deadlines and now > deadlines[name] + REQUEST_TIMEOUT:
+                    print(f"Source {name} timed out after {timeout:.0f}s")
+                    failed.append(name)
+                    pending.discard(future)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    # Keep failed_sources in source order regardless of completion order
+    return results, [name for name in sources if name in failed]
+
+# --------------------------- 
+# Normalize / filter / dedupe (vectorized) 
+# ---------------------------
+def normalize_symbols(collected: List[str]):
+    """
+    Column-wise version of the old per-symbol loop: strip + upper-case, drop > 12 chars,
+    drop ETF names and preferred suffixes, keep the first occurrence of each symbol.
+    Returns (normalized, counts) where counts breaks down what was dropped.
+    """
+    series = pd.Series(collected, dtype="object")
+    series = series[series.notna() & (series != "")]
+    series = series.astype(str).str.strip().str.upper()
+
+    too_long = series.str.len() > 12
+    series = series[~too_long]
+
+    excluded = pd.Series(False, index=series.index)
+    if IMPORT_FILTER.contains_pattern:
+        excluded |= series.str.contains(IMPORT_FILTER.contains_pattern, regex=True)
+    if IMPORT_FILTER.suffix_pattern:
+        excluded |= series.str.contains(IMPORT_FILTER.suffix_pattern, regex=True)
+    series = series[~excluded]
+
+    # Filters depend only on the symbol itself, so filtering before dedupe keeps the same first occurrences
+    normalized = series.drop_duplicates().tolist()
+    counts = {
+        "raw": len(collected),
+        "too_long": int(too_long.sum()),
+        "excluded": int(excluded.sum()),
+        "duplicates": len(series) - len(normalized),
+        "final": len(normalized),
+    }
+    return normalized, counts
+
 # --------------------------- 
 # Upsert + logging 
 # ---------------------------
+def send_symbol_upsert(batch: List[dict]):
+    supabase.table("symbols").upsert(batch).execute()
+
+def send_symbol_removal(batch: List[dict]):
+    symbols = [row["symbol"] for row in batch]
+    supabase.table("symbols").update({"is_valid": False, "source": REMOVED_SOURCE}).in_("symbol", symbols).execute()
+
 def upsert_symbols_batch(symbols: List[str]): 
-    batch = [] 
-    for sym in symbols: 
-        if not sym or len(sym) > 12: 
-            continue 
-        batch.append({"symbol": sym, "is_valid": None, "source": "hybrid-import"}) 
-        if len(batch) >= BATCH_SIZE: 
-            supabase.table("symbols").upsert(batch).execute() 
-            batch = [] 
-    if batch: 
-        supabase.table("symbols").upsert(batch).execute()
+    rows = ({"symbol": sym, "is_valid": None, "source": IMPORT_SOURCE} for sym in symbols if sym and len(sym) <= 12)
+    write_pipelined(send_symbol_upsert, rows, label="symbols upsert", initial_rows=BATCH_SIZE)
+
+def fetch_existing_symbols() -> dict:
+    """symbol -> source for every row in 'symbols', read page by page."""
+    existing = {}
+    start = 0
+    while True:
+        res = (supabase.table("symbols").select("symbol,source").order("symbol")
+               .range(start, start + SYMBOLS_PAGE_SIZE - 1).execute())
+        rows = res.data or []
+        for row in rows:
+            if row.get("symbol"):
+                existing[row["symbol"]] = row.get("source")
+        if len(rows) < SYMBOLS_PAGE_SIZE:
+            return existing
+        start += SYMBOLS_PAGE_SIZE
+
+def diff_symbols(symbols: List[str], existing: dict):
+    """
+    Returns (added, removed): symbols to (re)insert -- new ones plus ones this importer had
+    marked removed -- and importer-owned rows no longer in any source. Rows from other sources
+    are never touched, and rows that are unchanged are left alone so their is_valid survives.
+    """
+    current = {s for s in symbols if s and len(s) <= 12}
+    added = [s for s in symbols if s in current and existing.get(s, REMOVED_SOURCE) == REMOVED_SOURCE]
+    removed = sorted(s for s, source in existing.items() if source == IMPORT_SOURCE and s not in current)
+    return list(dict.fromkeys(added)), removed
+
+def sync_symbols_delta(symbols: List[str], allow_removals: bool = True) -> dict:
+    """Inserts new symbols and marks dropped ones (is_valid False) instead of re-upserting the whole universe."""
+    existing = fetch_existing_symbols()
+    added, removed = diff_symbols(symbols, existing)
+    imported = sum(1 for source in existing.values() if source == IMPORT_SOURCE)
+    if removed and not allow_removals:
+        print(f"Not marking {len(removed)} symbols removed: some sources failed this run.")
+        removed = []
+    elif removed and imported and len(removed) > MAX_REMOVED_FRACTION * imported:
+        print(f"Not marking {len(removed)} of {imported} symbols removed: above SYMBOLS_MAX_REMOVED_FRACTION "
+              f"({MAX_REMOVED_FRACTION:.0%}), a source probably came back short.")
+        removed = []
+
+    if added:
+        upsert_symbols_batch(added)
+    if removed:
+        # Sent as ?symbol=in.(...) filters, so the batch size is capped by URL length rather than payload
+        write_pipelined(send_symbol_removal, ({"symbol": s} for s in removed), label="symbols removal",
+                        initial_rows=SYMBOLS_FILTER_CHUNK, min_rows=SYMBOLS_FILTER_CHUNK // 4, max_rows=SYMBOLS_FILTER_CHUNK)
+
+    stats = {"existing": len(existing), "added": len(added), "removed": len(removed),
+             "unchanged": len(symbols) - len(added)}
+    print(f"Symbols delta: {stats['existing']} existing, {stats['added']} added, "
+          f"{stats['removed']} marked removed, {stats['unchanged']} unchanged.")
+    return stats
+
+def sync_symbols(symbols: List[str], failed_sources: List[str], mode: str = SYMBOLS_UPSERT_MODE) -> dict:
+    """Writes the normalized universe to 'symbols' using SYMBOLS_UPSERT_MODE."""
+    if mode == "full":
+        upsert_symbols_batch(symbols)
+        return {"added": len(symbols), "removed": 0}
+    # A failed source would make its symbols look delisted, so only mark removals after a clean fetch
+    return sync_symbols_delta(symbols, allow_removals=not failed_sources)
 
 def write_import_stats(status: str, fetched: int, filtered: int, error_message: Optional[str]): 
     payload = { 
@@ -314,7 +525,7 @@ def write_import_stats(status: str, fetched: int, filtered: int, error_message:
 # ---------------------------
 def send_slack(msg: str):
     if not SLACK_WEBHOOK_URL: print("Slack not configured; skipping Slack.")
-    try: requests.post(SLACK_WEBHOOK_URL, json={"text": msg}, timeout=10)
+    try: HTTP_SESSION.post(SLACK_WEBHOOK_URL, json={"text": msg}, timeout=10)
     except Exception as e: print("Slack send error:", e)
 
 def notify_error_sms(body: str):
@@ -330,86 +541,31 @@ def main():
     failed_sources = []
     
     try: 
-        # 1) indices from Wikipedia 
-        print("Fetching S&P 500...") 
-        s500 = fetch_symbols_from_wikipedia(WIKI_SP500) 
-        print(f"S&P500: {len(s500)}") 
-        print("Fetching S&P 400...") 
-        s400 = fetch_symbols_from_wikipedia(WIKI_SP400) 
-        print(f"S&P400: {len(s400)}") 
-        print("Fetching S&P 600...") 
-        s600 = fetch_symbols_from_wikipedia(WIKI_SP600) 
-        print(f"S&P600: {len(s600)}") 
-        sp1500 = list(set(s500 + s400 + s600)) 
-        
-        # Russell groups 
-        print("Fetching Russell 1000...") 
-        r1000 = fetch_russell_with_fallback(WIKI_R1000, RUSSELL1000_MIRRORS, expected_min=900) 
-        print(f"Russell1000: {len(r1000)}") 
-        print("Fetching Russell 2000...") 
-        r2000 = fetch_russell_with_fallback(WIKI_R2000, RUSSELL2000_MIRRORS, expected_min=1800) 
-        print(f"Russell2000: {len(r2000)}") 
-        print("Fetching Russell 3000...") 
-        r3000 = fetch_russell_with_fallback(WIKI_R3000, RUSSELL3000_MIRRORS, expected_min=2500) 
-        print(f"Russell3000: {len(r3000)}") 
-        
-        # DJIA 
-        print("Fetching DJIA (Dow 30)...") 
-        djia = fetch_symbols_from_wikipedia(WIKI_DJIA) 
-        print(f"DJIA: {len(djia)}") 
-        
-        # 2) OTC symbols (symbols-only) 
-        print("Fetching OTC symbols from mirrors (CSV/HTML fallbacks)...") 
-        otc = fetch_otc_symbols() 
-        print(f"OTC symbols fetched: {len(otc)}") 
-        if not otc: 
-            failed_sources.append("otc") 
-            
-        # 3) Best-effort exchanges (optional) 
-        print("Attempting NASDAQ/otherlisted (best-effort)...") 
-        ex = [] 
-        t = safe_get_text(NASDAQTXT_HTTP) 
-        if t: 
-            ex += parse_nasdaq_txt(t) 
-        t2 = safe_get_text(OTHERLISTED_HTTP) 
-        if t2: 
-            ex += parse_nasdaq_txt(t2) 
-            
+        # 1) indices from Wikipedia, Russell groups, DJIA, 2) OTC, 3) best-effort exchanges -- all fetched concurrently
+        print(f"Fetching {len(SYMBOL_SOURCES)} symbol sources with {SOURCE_WORKERS} workers...")
+        fetched, failed = fetch_sources_concurrently(SYMBOL_SOURCES)
+        failed_sources += failed
+
+        sp1500 = list(set(fetched["sp500"] + fetched["sp400"] + fetched["sp600"]))
+        ex = fetched["nasdaqlisted"] + fetched["otherlisted"]
+
         # 4) Merge everything 
-        collected += sp1500 + r1000 + r2000 + r3000 + djia + otc + ex 
+        collected += sp1500 + fetched["r1000"] + fetched["r2000"] + fetched["r3000"] + fetched["djia"] + fetched["otc"] + ex 
         raw_count = len(collected) 
         
-        # normalize, dedupe, filter ETFs conservatively 
-        seen = set() 
-        normalized = [] 
-        for s in collected: 
-            if not s: 
-                continue 
-            st = s.strip().upper() 
-            if len(st) > 12: 
-                continue 
-            if st in seen: 
-                continue 
-            
-            # Filter 1: Conservative ETF/ETN filter 
-            if any(tok in st for tok in ETF_KEYWORDS): 
-                continue 
-                
-            # Filter 2: NEW! Preferred stock filter (looks for common suffixes)
-            if any(st.endswith(pk) for pk in PREFERRED_KEYWORDS):
-                continue
-                
-            seen.add(st) 
-            normalized.append(st) 
-            
+        # normalize, dedupe, filter ETFs conservatively (vectorized)
+        normalized, counts = normalize_symbols(collected)
         filtered_count = len(normalized) 
-        print(f"Raw collected: {raw_count}; Final after filter: {filtered_count}") 
+        print(f"Raw collected: {raw_count}; Final after filter: {filtered_count} "
+              f"(too long: {counts['too_long']}, ETF/preferred: {counts['excluded']}, duplicates: {counts['duplicates']})") 
+        RATE_LIMITER.report() 
+        HTTP_CACHE.report() 
         
         # Upsert into Supabase 
-        upsert_symbols_batch(normalized) 
+        sync = sync_symbols(normalized, failed_sources) 
         write_import_stats("success", raw_count, filtered_count, None) 
         duration = time.time() - start 
-        send_slack(f" Import successful — Raw: {raw_count} Final: {filtered_count} Duration: {duration:.1f}s Failed sources: {failed_sources if failed_sources else 'none'}") 
+        send_slack(f" Import successful — Raw: {raw_count} Final: {filtered_count} Added: {sync['added']} Removed: {sync['removed']} Duration: {duration:.1f}s Failed sources: {failed_sources if failed_sources else 'none'}") 
         print("Import complete.") 
         
     except Exception as exc: 
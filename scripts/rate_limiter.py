@@ -0,0 +1,139 @@
+# scripts/rate_limiter.py
+"""
+Shared token-bucket rate limiter for upstream providers.
+One bucket per provider, configured as "<calls>/<period>" (e.g. "60/min", "100/day")
+from a JSON file named by RATE_LIMITS_FILE and/or RATE_LIMIT_<PROVIDER> env vars.
+Callers only sleep when the bucket is actually empty, and every provider keeps
+counters for time spent waiting on the limiter versus time spent on the network.
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+PERIOD_SECONDS = {
+    "s": 1, "sec": 1, "second": 1,
+    "m": 60, "min": 60, "minute": 60,
+    "h": 3600, "hour": 3600,
+    "d": 86400, "day": 86400,
+}
+
+# Longest we are willing to block for a single token. Daily budgets can ask for
+# waits of hours, which is never worth it inside one run.
+MAX_WAIT_SECONDS = float(os.environ.get("RATE_LIMIT_MAX_WAIT", 120))
+
+
+class RateLimitExhausted(Exception):
+    """Raised when the next token for a provider is further away than MAX_WAIT_SECONDS."""
+
+
+def parse_rate(spec: str) -> tuple:
+    """Parses "60/min" or "60/min:10" (":10" = burst size) into (rate_per_second, capacity)."""
+    spec = spec.strip().lower()
+    burst = None
+    if ":" in spec:
+        spec, burst_text = spec.split(":", 1)
+        burst = float(burst_text)
+    calls_text, _, period_text = spec.partition("/")
+    calls = float(calls_text)
+    period = PERIOD_SECONDS[(period_text or "s").strip()]
+    return calls / period, burst if burst is not None else calls
+
+
+class TokenBucket:
+    """Thread-safe token bucket; reservations may drive the balance negative so waiters queue fairly."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, max_wait: Optional[float] = None) -> float:
+        """Takes one token and returns how long the caller must wait before using it."""
+        with self.lock:
+            self._refill(time.monotonic())
+            wait = max(0.0, (1.0 - self.tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                raise RateLimitExhausted(f"next token in {wait:.0f}s exceeds max wait of {max_wait:.0f}s")
+            self.tokens -= 1.0
+            return wait
+
+
+class RateLimiter:
+    """Registry of per-provider buckets plus wait/network timing counters."""
+
+    def __init__(self, limits: Dict[str, str], max_wait: Optional[float] = MAX_WAIT_SECONDS):
+        self.buckets = {name: TokenBucket(*parse_rate(spec)) for name, spec in limits.items()}
+        self.limits = dict(limits)
+        self.max_wait = max_wait
+        self.stats_lock = threading.Lock()
+        self.stats = {}
+
+    def _record(self, provider: str, field: str, value: float):
+        with self.stats_lock:
+            counters = self.stats.setdefault(provider, {"calls": 0, "wait_seconds": 0.0, "network_seconds": 0.0})
+            counters[field] += value
+
+    def reserve(self, provider: str) -> float:
+        """Reserves a token for provider and returns the wait; unknown providers are unlimited."""
+        bucket = self.buckets.get(provider)
+        wait = bucket.reserve(self.max_wait) if bucket else 0.0
+        self._record(provider, "wait_seconds", wait)
+        return wait
+
+    def acquire(self, provider: str):
+        """Blocks until provider has budget for one more call."""
+        wait = self.reserve(provider)
+        if wait > 0:
+            time.sleep(wait)
+
+    @contextmanager
+    def timed(self, provider: str):
+        """Counts one call and the wall time spent inside the block as network time."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._record(provider, "calls", 1)
+            self._record(provider, "network_seconds", time.monotonic() - started)
+
+    @contextmanager
+    def request(self, provider: str):
+        """acquire() followed by timed() for the common single-call case."""
+        self.acquire(provider)
+        with self.timed(provider):
+            yield
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self.stats_lock:
+            return {name: dict(counters) for name, counters in self.stats.items()}
+
+    def report(self):
+        for provider, counters in sorted(self.snapshot().items()):
+            print(f"Rate limiter [{provider}] limit={self.limits.get(provider, 'unlimited')} "
+                  f"calls={counters['calls']:.0f} waited={counters['wait_seconds']:.1f}s "
+                  f"network={counters['network_seconds']:.1f}s")
+
+
+def load_limits(defaults: Dict[str, str]) -> Dict[str, str]:
+    """Merges defaults, then RATE_LIMITS_FILE (JSON object), then RATE_LIMIT_<PROVIDER> env vars."""
+    limits = dict(defaults)
+    config_path = os.environ.get("RATE_LIMITS_FILE")
+    if config_path:
+        try:
+            with open(config_path) as f:
+                limits.update({str(k).lower(): str(v) for k, v in json.load(f).items()})
+        except (OSError, ValueError) as e:
+            print(f"Could not read RATE_LIMITS_FILE {config_path}: {e}. Using defaults.")
+    for key, value in os.environ.items():
+        if key.startswith("RATE_LIMIT_") and key not in ("RATE_LIMIT_MAX_WAIT",) and value:
+            limits[key[len("RATE_LIMIT_"):].lower()] = value
+    return limits
@@ -1,11 +1,29 @@
 import os
 import json
+import argparse
+import math
 import time
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime, timedelta
 import random 
 import requests 
+import httpx
 from firebase_admin import credentials, initialize_app, firestore, exceptions
 from supabase import create_client 
+from rate_limiter import RateLimiter, RateLimitExhausted, load_limits
+from disk_cache import CACHE_DIR, DiskCache, make_key
+from http_session import HTTP_MAX_RETRIES, HTTP_POOL_MAXSIZE, get_session
+from symbol_filters import SymbolFilter
+from candles import CandleStore, candles_from_finnhub, volume_surge
+from history_store import HistoryStore
+from scoring import calculate_score, draw_jitter, score_rows
+from top_k import TopK
+from checkpoint import CheckpointJournal
+from scheduler import QuotaExhausted, QuotaTracker, prioritize_symbols
+from circuit_breaker import CircuitOpen, build_breakers, parse_retry_after
 
 # --------------------------- 
 # Environment / Supabase Configuration 
@@ -29,55 +47,344 @@ NEWSAPI_KEY = os.environ.get('NEWSAPI_KEY')
 FINANCIAL_API_KEY = os.environ.get('FINANCIAL_API_KEY') # Finnhub Key
 
 FINNHUB_BASE_URL = "https://finnhub.io/api/v1"
+GROQ_MODEL = os.environ.get('GROQ_MODEL', 'gemma2-9b-it')
+# Bump whenever either sentiment prompt (single or batched) changes so old cached scores stop matching
+SENTIMENT_PROMPT_VERSION = "v1"
 
 # --- RATE LIMIT CONFIGURATION & TARGETS ---
 TARGET_SYMBOL_COUNT = 200 
+# Always scored first, and the whole list when the news proxy is unavailable
+MAJOR_FALLBACK_LIST = ["MSFT", "AAPL", "GOOGL", "NVDA", "TSLA", "AMZN", "JPM", "V", "WMT", "KO", "BAC", "HD", "UNH", "PG", "JNJ", "MA", "ADBE", "TCEHY", "BABA"]
+TOP_K = int(os.environ.get("TOP_K", 20))  # stocks kept (and published) per run
+
+# Filter out obvious non-stock tickers from the news proxy (compiled once)
+NEWS_SYMBOL_FILTER = SymbolFilter(
+    contains=["ETF", "ETN", "FUND", "INDEX", "ETFS"],
+    suffixes=['.P', '.W', '.U', '.V', '.A', '.B', '.Q'],
+)
+
+# --- CONCURRENCY CONFIGURATION ---
+# Symbols scored at once, plus an upper bound on in-flight calls per provider.
+SCORING_WORKERS = int(os.environ.get("SCORING_WORKERS", 8))
+PROVIDER_CONCURRENCY = {
+    "newsapi": int(os.environ.get("NEWSAPI_CONCURRENCY", 2)),
+    "finnhub": int(os.environ.get("FINNHUB_CONCURRENCY", 4)),
+    "groq": int(os.environ.get("GROQ_CONCURRENCY", 4)),
+}
+PROVIDER_SLOTS = {name: threading.BoundedSemaphore(max(1, limit)) for name, limit in PROVIDER_CONCURRENCY.items()}
+# Threads for each symbol's Finnhub branches (P/E, filings, volume) while its own worker runs news -> sentiment.
+# Kept apart from the symbol pool so a worker never waits on a branch queued behind other workers. 0 = sequential.
+BRANCH_WORKERS = int(os.environ.get("BRANCH_WORKERS", SCORING_WORKERS * 3))
+BRANCH_EXECUTOR = ThreadPoolExecutor(max_workers=BRANCH_WORKERS, thread_name_prefix="branch") if BRANCH_WORKERS > 0 else None
+
+# Keep-alive session shared by every fetcher (pool sizes via HTTP_POOL_CONNECTIONS / HTTP_POOL_MAXSIZE).
+# No 5xx/read retries in the adapter: each fetcher's own retry loop re-enters provider_call, so every
+# request is counted against the token bucket, daily quota and breaker.
+HTTP_SESSION = get_session(provider_budgeted=True)
+
+# "threads" (ThreadPoolExecutor + requests) or "async" (one event loop + httpx.AsyncClient); --engine overrides
+SCREENER_ENGINE = os.environ.get("SCREENER_ENGINE", "threads").lower()
+
+# Token buckets per provider (free-tier quotas). Override with RATE_LIMIT_<PROVIDER>="N/min" or RATE_LIMITS_FILE.
+RATE_LIMITER = RateLimiter(load_limits({
+    "newsapi": "100/day",
+    "finnhub": "60/min",
+    "groq": "30/min",
+}))
+
+# Calls per provider per UTC day, shared across runs (QUOTA_<PROVIDER>=N to change a cap)
+QUOTA_TRACKER = QuotaTracker(DiskCache(os.path.join(CACHE_DIR, "quota.sqlite")))
+
+# One breaker per provider: a 429 (or repeated 5xx/transport errors) opens only that provider's circuit.
+# NewsAPI's 429 is a daily cap, so its default cooldown is long (BREAKER_COOLDOWN_<PROVIDER> overrides).
+BREAKERS = build_breakers(PROVIDER_CONCURRENCY, {"newsapi": 3600})
+
+# --- RESPONSE CACHE CONFIGURATION ---
+# Fundamentals and filing lists barely move overnight, so repeat runs serve them from disk.
+FINNHUB_CACHE_TTLS = {
+    "/stock/metric": float(os.environ.get("FINNHUB_METRIC_CACHE_TTL", 3 * 86400)),
+    "/stock/filings": float(os.environ.get("FINNHUB_FILINGS_CACHE_TTL", 36 * 3600)),
+}
+# The rolling from/to window changes every day; leaving it out of the key lets yesterday's entry hit
+CACHE_KEY_IGNORED_PARAMS = {"token", "from", "to"}
+RESPONSE_CACHE = DiskCache(os.path.join(CACHE_DIR, "responses.sqlite"))
+# A 4xx (other than 429) won't change on retry: remember it and don't ask again for this long.
+# 401/403 (no access with this key) block the whole endpoint, anything else just that symbol.
+# Long enough to span the next daily run, shorter than the data TTLs so access changes are noticed.
+FINNHUB_REJECTED_TTL = float(os.environ.get("FINNHUB_REJECTED_TTL", 36 * 3600))
+
+# Sentiment scores keyed by (model, prompt version, headline set): unchanged news never hits the LLM twice
+SENTIMENT_CACHE_TTL = float(os.environ.get("SENTIMENT_CACHE_TTL", 7 * 86400))
+SENTIMENT_CACHE = DiskCache(os.path.join(CACHE_DIR, "sentiment.sqlite"))
+
+# Batched sentiment: pack many symbols' headlines into one GROQ prompt of at most this many (estimated) tokens
+SENTIMENT_BATCH_MODE = os.environ.get("SENTIMENT_BATCH_MODE", "").lower() in ("1", "true", "yes")
+SENTIMENT_BATCH_TOKEN_BUDGET = int(os.environ.get("SENTIMENT_BATCH_TOKEN_BUDGET", 6000))
+
+# Daily candles kept locally per symbol (.cache/candles/*.npy); only the last stored session onward is fetched
+CANDLE_STORE = CandleStore()
+CANDLE_REFRESH_AGE = float(os.environ.get("CANDLE_REFRESH_AGE", 12 * 3600))  # re-fetch once the file is older
+CANDLE_LOOKBACK_DAYS = int(os.environ.get("CANDLE_LOOKBACK_DAYS", 45))  # calendar days fetched for a new symbol
+
+# Every scored symbol's fundamentals + score, one row per run (.cache/history; query with scripts/history_store.py)
+HISTORY_STORE = HistoryStore()
+HISTORY_FLUSH_ROWS = int(os.environ.get("HISTORY_FLUSH_ROWS", 50))  # buffered history rows before they're written out
 # --------------------------------
 
 # ===============================================
 # A. API CALLS & DATA FETCHERS (DEFINED FIRST)
 # ===============================================
 
+# --- Per-branch timing for fetch_fundamentals ---
+BRANCH_TIMINGS = {}  # branch -> {"calls", "seconds", "max"}; "symbol" is the wall time of the whole fan-out
+BRANCH_TIMINGS_LOCK = threading.Lock()
+
+def record_branch(name: str, seconds: float):
+    with BRANCH_TIMINGS_LOCK:
+        stats = BRANCH_TIMINGS.setdefault(name, {"calls": 0, "seconds": 0.0, "max": 0.0})
+        stats["calls"] += 1
+        stats["seconds"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+
+def timed_branch(name: str, fn, *args):
+    started = time.monotonic()
+    try:
+        return fn(*args)
+    finally:
+        record_branch(name, time.monotonic() - started)
+
+def submit_branch(name: str, fn, *args) -> Future:
+    """Runs one branch on BRANCH_EXECUTOR, or inline (as an already-finished Future) when branching is off."""
+    if BRANCH_EXECUTOR is not None:
+        return BRANCH_EXECUTOR.submit(timed_branch, name, fn, *args)
+    future = Future()
+    try:
+        future.set_result(timed_branch(name, fn, *args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def report_branch_timings():
+    """Average/max seconds per branch, and per-symbol wall time against the sequential sum of its branches."""
+    with BRANCH_TIMINGS_LOCK:
+        timings = {name: dict(stats) for name, stats in BRANCH_TIMINGS.items()}
+    symbol = timings.pop("symbol", None)
+    for name, stats in sorted(timings.items()):
+        print(f"Branch [{name}] calls={stats['calls']} avg={stats['seconds'] / stats['calls']:.2f}s max={stats['max']:.2f}s")
+    if symbol and symbol["calls"]:
+        serial = sum(stats["seconds"] for stats in timings.values()) / symbol["calls"]
+        print(f"Per-symbol fetch: {symbol['seconds'] / symbol['calls']:.2f}s wall vs {serial:.2f}s if branches ran back to back")
+
+def breaker_delay(provider: str, waited: float) -> float:
+    """0.0 once the provider's breaker lets a call through, else how long to wait before asking again.
+
+    A cooldown that ends within RATE_LIMIT_MAX_WAIT in total (e.g. a 429 with a short Retry-After)
+    is waited out rather than served with neutral stand-ins; anything longer raises CircuitOpen.
+    """
+    breaker = BREAKERS[provider]
+    delay = breaker.delay()
+    if delay and RATE_LIMITER.max_wait is not None and waited + delay > RATE_LIMITER.max_wait:
+        breaker.reject()
+        raise CircuitOpen(f"{provider} circuit open")
+    return delay
+
+def admit(provider: str) -> float:
+    """Checks the daily quota and reserves a rate-limit token (the breaker has let the call through already);
+    returns how long to wait before calling."""
+    breaker = BREAKERS[provider]
+    try:
+        if not QUOTA_TRACKER.try_consume(provider):
+            raise QuotaExhausted(f"{provider} daily quota used up")
+        try:
+            return RATE_LIMITER.reserve(provider)
+        except RateLimitExhausted:
+            # No call goes out, so the persisted daily count mustn't keep the unit
+            QUOTA_TRACKER.refund(provider)
+            raise
+    except RateLimitExhausted:
+        breaker.cancel_probe()
+        raise
+
+@contextmanager
+def provider_call(provider: str):
+    """Waits out a short breaker cooldown, admits the call, waits for its token and a concurrency slot,
+    then times the call as network time."""
+    waited = 0.0
+    while (pause := breaker_delay(provider, waited)) > 0:
+        time.sleep(pause)
+        waited += pause
+    delay = admit(provider)
+    breaker = BREAKERS[provider]
+    try:
+        if delay > 0:
+            time.sleep(delay)
+        with PROVIDER_SLOTS[provider], RATE_LIMITER.timed(provider):
+            yield
+    except requests.exceptions.RequestException:
+        # Resets, timeouts, broken or undecodable bodies, redirect loops: the provider didn't answer usefully
+        breaker.record_failure()
+        raise
+    except BaseException:
+        # Anything else means no verdict on the provider; free a half-open probe so it isn't rejected for good
+        breaker.cancel_probe()
+        raise
+
+def check_response(provider: str, response):
+    """Feeds a response status to the provider's breaker; a 429 opens it (for Retry-After seconds) and raises CircuitOpen."""
+    breaker = BREAKERS[provider]
+    if response.status_code == 429:
+        breaker.record_failure(parse_retry_after(response.headers.get("Retry-After")), throttled=True)
+        raise CircuitOpen(f"429 from {provider}")
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+# --- Retry policy (shared by the thread and async engines) ---
+# Each fetcher only runs its loop and sends the request; what a failure means, how long to back off
+# and when to give up are decided here, so the two engines can't drift apart.
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = {"finnhub": 1, "groq": 0}  # back-off before retry n is this + 2**n seconds
+PROVIDER_NAMES = {"newsapi": "NewsAPI", "finnhub": "Finnhub", "groq": "GROQ"}
+
+class FinnhubRejected(Exception):
+    """A 4xx other than 429 from Finnhub: retrying the same request won't help."""
+
+# Transport/HTTP errors from either client, plus undecodable or malformed bodies (ValueError)
+TRANSIENT_ERRORS = (requests.exceptions.RequestException, httpx.HTTPError, ValueError)
+# What a fetcher catches: transient errors, plus answers that end its attempts at once
+# (budget spent or circuit open, a Finnhub 4xx)
+FETCH_ERRORS = TRANSIENT_ERRORS + (RateLimitExhausted, FinnhubRejected)
+
+def retry_delay(provider: str, context: str, error: Exception, attempt: int):
+    """Seconds to back off after a failed attempt, or None to give up (with the reason logged)."""
+    name = PROVIDER_NAMES[provider]
+    if isinstance(error, RateLimitExhausted):
+        print(f"{name} unavailable {context}: {error}")
+        return None
+    if isinstance(error, FinnhubRejected):
+        print(f"{name} rejected {context}: {error}; not retried for {FINNHUB_REJECTED_TTL / 3600:.0f}h")
+        return None
+    if attempt == MAX_RETRIES - 1:
+        print(f"{name} API final attempt failed {context}: {error}")
+        return None
+    return RETRY_BASE_DELAY[provider] + 2 ** attempt
+
+def news_url(symbol: str) -> str:
+    return f"https://newsapi.org/v2/everything?q={symbol} stock&sortBy=publishedAt&language=en&pageSize=10&apiKey={NEWSAPI_KEY}"
+
+def headlines_from_response(response) -> str:
+    """Status handling + headline extraction for a NewsAPI response (requests or httpx)."""
+    # NewsAPI's 429 means the daily quota is gone: its breaker opens, Finnhub/GROQ work carries on
+    if response.status_code == 429:
+        QUOTA_TRACKER.exhaust("newsapi")
+    check_response("newsapi", response)
+        
+    response.raise_for_status()
+    data = response.json()
+    
+    headlines = [article.get('title', '') for article in data.get('articles', []) if article.get('title')]
+    if not headlines:
+        return "No recent news found."
+        
+    return "\n".join(headlines)
+
+def news_fetch_failed(symbol: str, error: Exception) -> str:
+    print(f"Error fetching news for {symbol}: {error}")
+    return "News fetch failed."
+
 def fetch_news_headlines(symbol: str) -> str:
     """Fetches recent news headlines for a symbol using NEWSAPI."""
     if not NEWSAPI_KEY:
         print("NEWSAPI_KEY not found. Skipping news fetch.")
         return "No recent news found."
 
-    # CRITICAL: Sleep 3 seconds here to obey NewsAPI's strict rate limits
-    time.sleep(3) 
+    try:
+        # The NewsAPI token bucket only delays us when the daily budget requires it
+        with provider_call("newsapi"):
+            response = HTTP_SESSION.get(news_url(symbol), timeout=10)
+        return headlines_from_response(response)
+
+    except FETCH_ERRORS as e:
+        return news_fetch_failed(symbol, e)
 
-    url = f"https://newsapi.org/v2/everything?q={symbol} stock&sortBy=publishedAt&language=en&pageSize=10&apiKey={NEWSAPI_KEY}"
+def sentiment_cache_key(news_text: str, prompt: str = "single") -> str:
+    """Content hash of the headline set: case, spacing, order and duplicates don't change the key.
+
+    prompt ("single" or "batch") keeps scores from the two different prompts apart.
+    """
+    headlines = {" ".join(line.split()).lower() for line in news_text.splitlines()}
+    headlines.discard("")
+    return make_key(GROQ_MODEL, SENTIMENT_PROMPT_VERSION, prompt, sorted(headlines))
+
+def has_scorable_news(news_text: str) -> bool:
+    """False when the news text is too short or indicates failure, so the LLM call is skipped."""
+    return not (len(news_text) < 50 or "No recent news found" in news_text or "News fetch failed" in news_text)
+
+GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+def groq_request(system_prompt: str, user_query: str, response_schema: dict) -> tuple:
+    """Headers and JSON payload for one GROQ chat-completion request."""
+    payload = {
+        "contents": [{ "parts": [{ "text": user_query }] }],
+        "systemInstruction": { "parts": [{ "text": system_prompt }] },
+        "generationConfig": {
+            "responseMimeType": "application/json",
+            "responseSchema": response_schema
+        },
+        "model": GROQ_MODEL 
+    }
+    headers = {
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    return headers, payload
+
+def groq_json_from_response(response):
+    """Status handling + parsing of the JSON the model returned as message content."""
+    check_response("groq", response)
+    response.raise_for_status()
+    
+    groq_result = response.json()
     try:
-        response = requests.get(url, timeout=10)
-        
-        # Immediate check for the 429 error and raise if hit, which stops the whole job
-        if response.status_code == 429:
-            raise requests.exceptions.RequestException(f"429 Client Error: NewsAPI limit reached on {symbol}. Stopping scoring loop.")
-            
-        response.raise_for_status()
-        data = response.json()
-        
-        headlines = [article.get('title', '') for article in data.get('articles', []) if article.get('title')]
-        if not headlines:
-            return "No recent news found."
-            
-        return "\n".join(headlines)
+        # Corrected path for response content for Groq's structure
+        json_str = groq_result['choices'][0]['message']['content'] 
+        return json.loads(json_str)
+    except (KeyError, IndexError, TypeError) as e:
+        # No choices, null content, a non-object body: retried like an undecodable one
+        raise ValueError(f"malformed GROQ response: {e!r}") from e
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching news for {symbol}: {e}")
-        return "News fetch failed."
+def request_groq_json(label: str, system_prompt: str, user_query: str, response_schema: dict):
+    """Sends one chat-completion request to GROQ with retry and returns the parsed JSON content (or None)."""
+    headers, payload = groq_request(system_prompt, user_query, response_schema)
+    
+    for attempt in range(MAX_RETRIES):
+        try:
+            with provider_call("groq"):
+                response = HTTP_SESSION.post(GROQ_URL, headers=headers, json=payload, timeout=20)
+            return groq_json_from_response(response)
+            
+        except FETCH_ERRORS as e:
+            delay = retry_delay("groq", f"for {label}", e, attempt)
+            if delay is None:
+                break
+            time.sleep(delay) 
+    return None
 
-def get_sentiment_score(symbol: str, news_text: str) -> float:
-    """Uses GROQ LLM to analyze news text and return a sentiment score (0.0 to 1.0)."""
+def sentiment_without_llm(news_text: str):
+    """Mock, neutral or cached score when no GROQ call is needed, else None."""
     if not GROQ_API_KEY:
         print("GROQ_API_KEY not found. Using mock sentiment.")
         return random.uniform(0.4, 0.95)
     
     # Skip LLM call if the news text is too short or indicates failure
-    if len(news_text) < 50 or "No recent news found" in news_text or "News fetch failed" in news_text:
+    if not has_scorable_news(news_text):
         return random.uniform(0.45, 0.55)
 
+    return SENTIMENT_CACHE.get("sentiment", sentiment_cache_key(news_text))
+
+def sentiment_prompt(symbol: str, news_text: str) -> tuple:
+    """(system_prompt, user_query, response_schema) for one symbol's headlines."""
     system_prompt = (
         "You are a concise financial sentiment analyzer. Your task is to analyze the provided text, "
         "which consists of recent news headlines for a stock, and output a JSON object only. "
@@ -85,113 +392,280 @@ def get_sentiment_score(symbol: str, news_text: str) -> float:
         "Do not include any other text, explanations, or markdown."
     )
     user_query = f"Analyze the overall financial sentiment for {symbol} based on the following headlines:\n\n---\n{news_text}"
-    
-    payload = {
-        "contents": [{ "parts": [{ "text": user_query }] }],
-        "systemInstruction": { "parts": [{ "text": system_prompt }] },
-        "generationConfig": {
-            "responseMimeType": "application/json",
-            "responseSchema": {
-                "type": "OBJECT",
-                "properties": { "sentiment_score": { "type": "NUMBER", "description": "Sentiment score between 0.0 and 1.0." } }
-            }
-        },
-        "model": "gemma2-9b-it" 
+    response_schema = {
+        "type": "OBJECT",
+        "properties": { "sentiment_score": { "type": "NUMBER", "description": "Sentiment score between 0.0 and 1.0." } }
     }
-    
-    MAX_RETRIES = 3
-    for attempt in range(MAX_RETRIES):
-        try:
-            url = "https://api.groq.com/openai/v1/chat/completions" 
-            headers = {
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(url, headers=headers, json=payload, timeout=20)
-            response.raise_for_status()
-            
-            groq_result = response.json()
-            # Corrected path for response content for Groq's structure
-            json_str = groq_result['choices'][0]['message']['content'] 
-            parsed_json = json.loads(json_str)
-            
-            score = float(parsed_json.get('sentiment_score', 0.5))
-            return max(0.0, min(1.0, score)) 
-            
-        except (requests.exceptions.RequestException, json.JSONDecodeError, KeyError) as e:
-            if attempt == MAX_RETRIES - 1:
-                print(f"GROQ API final attempt failed for {symbol}: {e}")
-            else:
-                time.sleep(2 ** attempt) 
-    
-    return random.uniform(0.4, 0.6) 
+    return system_prompt, user_query, response_schema
 
-def fetch_finnhub_data(endpoint: str, symbol: str, params: dict = None) -> dict:
-    """Generic helper for Finnhub API calls with retry."""
-    if not FINANCIAL_API_KEY:
-        print("Finnhub API key missing. Skipping API fetch.")
+def neutral_sentiment() -> float:
+    """Neutral-ish stand-in when the model gave no usable score (never cached)."""
+    return random.uniform(0.4, 0.6)
+
+def clamp_sentiment(value):
+    """The model's value clamped to 0.0-1.0, or None unless it is a finite number (bools excluded)."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return max(0.0, min(1.0, float(value)))
+    return None
+
+def sentiment_from_json(news_text: str, parsed_json) -> float:
+    """Clamps and caches the model's score; a missing or malformed answer becomes a neutral-ish default."""
+    score = clamp_sentiment(parsed_json.get('sentiment_score')) if isinstance(parsed_json, dict) else None
+    if score is None:
+        return neutral_sentiment()
+
+    SENTIMENT_CACHE.set("sentiment", sentiment_cache_key(news_text), score, SENTIMENT_CACHE_TTL)
+    return score 
+
+def get_sentiment_score(symbol: str, news_text: str) -> float:
+    """Uses GROQ LLM to analyze news text and return a sentiment score (0.0 to 1.0)."""
+    score = sentiment_without_llm(news_text)
+    if score is not None:
+        return score
+    return request_sentiment_score(symbol, news_text)
+
+def request_sentiment_score(symbol: str, news_text: str) -> float:
+    """The single-symbol GROQ call behind get_sentiment_score, without the cache lookup."""
+    parsed_json = request_groq_json(symbol, *sentiment_prompt(symbol, news_text))
+    return sentiment_from_json(news_text, parsed_json)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used to size batched prompts."""
+    return len(text) // 4 + 1
+
+def pack_sentiment_batches(sections: dict, token_budget: int) -> list:
+    """Greedily groups symbol -> prompt section into batches that fit within token_budget."""
+    batches, current, used = [], {}, 0
+    for symbol, section in sections.items():
+        cost = estimate_tokens(section)
+        if current and used + cost > token_budget:
+            batches.append(current)
+            current, used = {}, 0
+        current[symbol] = section
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def score_sentiment_batch(sections: dict) -> dict:
+    """Scores one packed batch with a single GROQ call; returns only the well-formed symbol scores."""
+    system_prompt = (
+        "You are a concise financial sentiment analyzer. You will receive recent news headlines for several stocks, "
+        "each block starting with a line of the form '### <SYMBOL>'. Output a JSON object only, mapping every symbol "
+        "to a float value between 0.0 (extremely negative) and 1.0 (extremely positive). "
+        "Do not include any other text, explanations, or markdown."
+    )
+    user_query = "Analyze the overall financial sentiment for each of the following stocks:\n\n" + "\n\n".join(sections.values())
+    response_schema = {
+        "type": "OBJECT",
+        "properties": { symbol: { "type": "NUMBER" } for symbol in sections }
+    }
+
+    parsed_json = request_groq_json(f"batch of {len(sections)}", system_prompt, user_query, response_schema)
+    if not isinstance(parsed_json, dict):
         return {}
 
-    # CRITICAL: Sleep 1.5 seconds here to obey Finnhub's strict rate limits
-    time.sleep(1.5)
+    scores = {}
+    for symbol in sections:
+        score = clamp_sentiment(parsed_json.get(symbol))
+        if score is not None:
+            scores[symbol] = score
+    return scores
 
+def get_sentiment_scores_batch(news_by_symbol: dict) -> dict:
+    """Batched variant of get_sentiment_score: packs many symbols per GROQ prompt, re-requesting misses one by one."""
+    scores = {}
+    sections = {}
+    for symbol, news_text in news_by_symbol.items():
+        if not GROQ_API_KEY or not has_scorable_news(news_text):
+            # Same mock/neutral handling as the single-symbol path
+            scores[symbol] = get_sentiment_score(symbol, news_text)
+            continue
+        cached = SENTIMENT_CACHE.get("sentiment", sentiment_cache_key(news_text, "batch"))
+        if cached is not None:
+            scores[symbol] = cached
+            continue
+        sections[symbol] = f"### {symbol}\n{news_text}"
+
+    batches = pack_sentiment_batches(sections, SENTIMENT_BATCH_TOKEN_BUDGET)
+    if batches:
+        print(f"Scoring sentiment for {len(sections)} symbols in {len(batches)} batched GROQ requests.")
+    with ThreadPoolExecutor(max_workers=max(1, PROVIDER_CONCURRENCY["groq"])) as pool:
+        batch_results = list(pool.map(score_sentiment_batch, batches))
+
+    retry = []
+    for batch, batch_scores in zip(batches, batch_results):
+        for symbol in batch:
+            if symbol in batch_scores:
+                scores[symbol] = batch_scores[symbol]
+                key = sentiment_cache_key(news_by_symbol[symbol], "batch")
+                SENTIMENT_CACHE.set("sentiment", key, batch_scores[symbol], SENTIMENT_CACHE_TTL)
+            else:
+                retry.append(symbol)
+
+    # Anything missing or malformed in a batched answer falls back to its own request (already a cache miss above)
+    if retry:
+        print(f"Re-requesting sentiment individually for {len(retry)} symbols missing from batched responses.")
+    for symbol in retry:
+        scores[symbol] = request_sentiment_score(symbol, news_by_symbol[symbol])
+    return scores
+
+def finnhub_cache_key(endpoint: str, symbol: str, params: dict = None) -> tuple:
+    """(cache_key, ttl); both None for endpoints that aren't cached."""
+    ttl = FINNHUB_CACHE_TTLS.get(endpoint)
+    if not ttl:
+        return None, None
+    key_params = {k: v for k, v in (params or {}).items() if k not in CACHE_KEY_IGNORED_PARAMS}
+    return make_key(endpoint, symbol, key_params), ttl
+
+def finnhub_cache_lookup(endpoint: str, symbol: str, params: dict = None) -> tuple:
+    """(cache_key, ttl, fresh cached value or None); cache_key is None for endpoints that aren't cached."""
+    cache_key, ttl = finnhub_cache_key(endpoint, symbol, params)
+    if cache_key is None:
+        return None, None, None
+    return cache_key, ttl, RESPONSE_CACHE.get("finnhub", cache_key)
+
+def finnhub_request(endpoint: str, symbol: str, params: dict = None) -> tuple:
     url = f"{FINNHUB_BASE_URL}{endpoint}"
     
     full_params = {"symbol": symbol, "token": FINANCIAL_API_KEY}
     if params:
         full_params.update(params)
+    return url, full_params
+
+def rejection_keys(endpoint: str, symbol: str) -> tuple:
+    return endpoint, f"{endpoint}:{symbol}"
+
+def finnhub_rejected(endpoint: str, symbol: str) -> bool:
+    """True while a recent 4xx for this endpoint (or endpoint + symbol) is remembered.
+
+    A remembered rejection counts as a hit of the negative cache; finding none isn't a miss.
+    """
+    return any(RESPONSE_CACHE.get("finnhub_rejected", key, count_miss=False) is not None
+               for key in rejection_keys(endpoint, symbol))
+
+def finnhub_data_from_response(response, endpoint: str, symbol: str, cache_key, ttl):
+    """Status handling, empty-list normalisation and caching for a Finnhub response."""
+    # A 429 opens the Finnhub breaker for Retry-After seconds; NewsAPI/GROQ work is unaffected
+    check_response("finnhub", response)
+    if 400 <= response.status_code < 500:
+        endpoint_key, symbol_key = rejection_keys(endpoint, symbol)
+        key = endpoint_key if response.status_code in (401, 403) else symbol_key
+        RESPONSE_CACHE.set("finnhub_rejected", key, response.status_code, FINNHUB_REJECTED_TTL)
+        raise FinnhubRejected(f"HTTP {response.status_code}")
+    response.raise_for_status()
+    
+    data = response.json()
+    # FIX: If API returns an empty list (no data), treat it as an empty dictionary
+    if isinstance(data, list) and not data:
+        data = {}
+    if cache_key:
+        RESPONSE_CACHE.set("finnhub", cache_key, data, ttl)
+    return data
+
+def finnhub_fallback(cache_key, outage: bool = False) -> tuple:
+    """(data, degraded) when no fresh answer is available: an expired copy still beats the neutral default.
+
+    degraded is True only for an outage on a cached endpoint with no copy at all, i.e. the
+    symbol's row would be built from neutral stand-ins that a later run could replace.
+    """
+    if cache_key:
+        # The lookup before the request already counted this key's miss (or the rejection's hit)
+        stale = RESPONSE_CACHE.get("finnhub", cache_key, allow_stale=True, count_miss=False)
+        if stale is not None:
+            return stale, False
+    return {}, outage and cache_key is not None
+
+def finnhub_without_request(endpoint: str, symbol: str, params: dict = None) -> tuple:
+    """(cache_key, ttl, result): result is (data, degraded) when no request should be sent, else None."""
+    if not FINANCIAL_API_KEY:
+        print("Finnhub API key missing. Skipping API fetch.")
+        return None, None, ({}, False)
+
+    # Rejections first: a remembered 4xx is answered from the negative cache, not counted as a response-cache miss
+    if finnhub_rejected(endpoint, symbol):
+        cache_key, ttl = finnhub_cache_key(endpoint, symbol, params)
+        return cache_key, ttl, finnhub_fallback(cache_key)
+    cache_key, ttl, cached = finnhub_cache_lookup(endpoint, symbol, params)
+    if cached is not None:
+        return cache_key, ttl, (cached, False)
+    return cache_key, ttl, None
+
+def finnhub_gave_up(cache_key, error: Exception) -> tuple:
+    """(data, degraded) once retry_delay has given up: a rejection is Finnhub's answer, anything else an outage."""
+    return finnhub_fallback(cache_key, outage=not isinstance(error, FinnhubRejected))
+
+def finnhub_data(result: tuple, endpoint: str, degraded: set = None) -> dict:
+    """The data of a (data, degraded) result; endpoint is added to the caller's degraded set if that data is a stand-in."""
+    data, is_degraded = result
+    if is_degraded and degraded is not None:
+        degraded.add(endpoint)
+    return data
+
+def fetch_finnhub_data(endpoint: str, symbol: str, params: dict = None, degraded: set = None) -> dict:
+    """Generic helper for Finnhub API calls with retry, served from the disk cache when fresh.
+
+    Pass a set as degraded to learn whether the data is a neutral stand-in (see finnhub_fallback):
+    the endpoint is added to it.
+    """
+    return finnhub_data(fetch_finnhub_result(endpoint, symbol, params), endpoint, degraded)
+
+def fetch_finnhub_result(endpoint: str, symbol: str, params: dict = None) -> tuple:
+    """fetch_finnhub_data's (data, degraded)."""
+    cache_key, ttl, result = finnhub_without_request(endpoint, symbol, params)
+    if result is not None:
+        return result
+    url, full_params = finnhub_request(endpoint, symbol, params)
 
-    MAX_RETRIES = 3
     for attempt in range(MAX_RETRIES):
         try:
-            response = requests.get(url, params=full_params, timeout=15)
+            # The Finnhub token bucket only delays us when the per-minute budget requires it
+            with provider_call("finnhub"):
+                response = HTTP_SESSION.get(url, params=full_params, timeout=15)
+            return finnhub_data_from_response(response, endpoint, symbol, cache_key, ttl), False
             
-            # Immediate check for the 429 error and raise if hit
-            if response.status_code == 429:
-                 raise requests.exceptions.RequestException(f"429 Client Error: Finnhub limit reached on {symbol} at {endpoint}. Stopping scoring loop.")
-                 
-            response.raise_for_status()
-            
-            data = response.json()
-            # FIX: If API returns an empty list (no data), treat it as an empty dictionary
-            if isinstance(data, list) and not data:
-                return {}
-            return data
-            
-        except requests.exceptions.RequestException as e:
-            if attempt == MAX_RETRIES - 1:
-                print(f"Finnhub API final attempt failed ({endpoint}) for {symbol}: {e}")
-            else:
-                time.sleep(1 + 2 ** attempt)
-    return {}
+        except FETCH_ERRORS as e:
+            delay = retry_delay("finnhub", f"({endpoint}) for {symbol}", e, attempt)
+            if delay is None:
+                return finnhub_gave_up(cache_key, e)
+            time.sleep(delay)
 
-def get_pe_ratio(symbol: str) -> float:
-    """Fetches the latest P/E ratio."""
-    data = fetch_finnhub_data("/stock/metric", symbol, {"metric": "price-to-book"}) 
-    
-    if not isinstance(data, dict):
-        return round(random.uniform(15.0, 80.0), 1)
+PE_METRIC_PARAMS = {"metric": "price-to-book"}
+
+def get_pe_ratio(symbol: str, degraded: set = None):
+    """Fetches the latest P/E ratio (None when unavailable); see fetch_finnhub_data for degraded."""
+    return pe_from_metric(symbol, fetch_finnhub_data("/stock/metric", symbol, PE_METRIC_PARAMS, degraded))
 
-    pe_ratio = data.get('metric', {}).get('peTTM', None) 
-    if pe_ratio and isinstance(pe_ratio, (int, float)):
+def pe_from_metric(symbol: str, data):
+    """peTTM from a /stock/metric answer, or None when there is none.
+
+    None is published and stored as-is (no made-up P/E) and scores PE_DEFAULT_POINTS.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('metric'), dict):
+        return None
+
+    pe_ratio = data['metric'].get('peTTM', None) 
+    if pe_ratio and isinstance(pe_ratio, (int, float)) and not isinstance(pe_ratio, bool):
         print(f"Fetched P/E for {symbol}: {pe_ratio:.1f}")
         return pe_ratio
-    return round(random.uniform(15.0, 80.0), 1)
+    return None
 
-def get_sec_filing_count(symbol: str) -> int:
-    """Counts recent 10-K and 10-Q filings (last 90 days)."""
+def filings_params() -> dict:
+    """Query window for recent 10-K and 10-Q filings (last 90 days)."""
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days=90)
     
-    params = {
+    return {
         "from": start_date.isoformat(),
         "to": end_date.isoformat(),
         "type": "10-K,10-Q" 
     }
-    
-    data = fetch_finnhub_data("/stock/filings", symbol, params)
-    
+
+def get_sec_filing_count(symbol: str, degraded: set = None) -> int:
+    """Counts recent 10-K and 10-Q filings (last 90 days); see fetch_finnhub_data for degraded."""
+    return count_filings(symbol, fetch_finnhub_data("/stock/filings", symbol, filings_params(), degraded))
+
+def count_filings(symbol: str, data) -> int:
     if not isinstance(data, dict):
         return 0
         
@@ -200,6 +674,48 @@ def get_sec_filing_count(symbol: str) -> int:
     print(f"Found {count} recent SEC filings for {symbol}.")
     return count
 
+def candle_params(symbol: str, candles):
+    """/stock/candle query from the last stored session on, or None while the stored file is fresh."""
+    age = CANDLE_STORE.age(symbol)
+    if age is not None and age <= CANDLE_REFRESH_AGE:
+        return None
+    now = int(time.time())
+    # The last stored session is asked for again: it may have been a partial intraday candle, and
+    # CandleStore.append lets the newer row replace it
+    start = int(candles["t"][-1]) if len(candles) else now - CANDLE_LOOKBACK_DAYS * 86400
+    return {"resolution": "D", "from": start, "to": now}
+
+def get_volume_surge(symbol: str) -> float:
+    """Latest session's volume over its rolling average, from the local candle store topped up via Finnhub."""
+    candles = CANDLE_STORE.load(symbol)
+    params = candle_params(symbol, candles)
+    data = fetch_finnhub_data("/stock/candle", symbol, params) if params else None
+    return volume_surge_from(symbol, candles, data)
+
+def volume_surge_from(symbol: str, candles, data) -> float:
+    # "no_data" is a real answer (nothing new since start), so it still marks the file fresh
+    if isinstance(data, dict) and data.get("s") in ("ok", "no_data"):
+        candles = CANDLE_STORE.append(symbol, candles_from_finnhub(data))
+
+    surge = volume_surge(candles["v"])
+    if surge is None:
+        return 1.0  # not enough history: neutral, same as calculate_score's default
+    print(f"Volume surge for {symbol}: {surge:.2f}x")
+    return round(surge, 1)
+
+def schedule_symbols(candidates: list) -> list:
+    """Orders symbols for the run (leaders, then stalest history, then new) and logs the daily budget left."""
+    ordered = prioritize_symbols(candidates, MAJOR_FALLBACK_LIST, HISTORY_STORE.last_seen(candidates))
+    news_left = QUOTA_TRACKER.remaining("newsapi")
+    if news_left is not None and news_left < min(len(ordered), TARGET_SYMBOL_COUNT):
+        print(f"NewsAPI has {news_left} calls left today: headlines for the first ~{news_left} scheduled symbols, "
+              f"the rest are scored on Finnhub data with neutral sentiment.")
+    return ordered
+
+def symbols_fetch_failed(error: Exception) -> list:
+    print(f"Error fetching symbols via Finnhub News proxy: {error}. Using guaranteed fallback list.")
+    return MAJOR_FALLBACK_LIST
+
 def get_top_200_symbols() -> list:
     """
     Fetches a proxy list of up to 200 highly relevant symbols 
@@ -207,158 +723,532 @@ def get_top_200_symbols() -> list:
     
     Returns a list of unique ticker symbols.
     """
-    MAJOR_FALLBACK_LIST = ["MSFT", "AAPL", "GOOGL", "NVDA", "TSLA", "AMZN", "JPM", "V", "WMT", "KO", "BAC", "HD", "UNH", "PG", "JNJ", "MA", "ADBE", "TCEHY", "BABA"]
-    
     if not FINANCIAL_API_KEY:
         print("Finnhub API key missing. Using guaranteed fallback symbols.")
         return MAJOR_FALLBACK_LIST
 
-    # Fetch symbols that are mentioned in general news (proxy for most active/relevant)
-    url = f"{FINNHUB_BASE_URL}/news?category=general&minId=0&token={FINANCIAL_API_KEY}"
-    
     try:
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        articles = response.json()
-        
-        symbols = set()
-        for article in articles:
-            related = article.get('related', '')
-            if related:
-                symbols.update([s.strip() for s in related.split(',') if s.strip()])
-                
-        # Filter out obvious non-stock tickers
-        ETF_KEYWORDS = ["ETF", "ETN", "FUND", "INDEX", "ETFS"]
-        filtered_symbols = [
-            s for s in symbols 
-            if s and 
-            s not in MAJOR_FALLBACK_LIST and 
-            not any(tok in s for tok in ETF_KEYWORDS) and
-            not any(s.endswith(suffix) for suffix in ['.P', '.W', '.U', '.V', '.A', '.B', '.Q'])
-        ]
-        
-        # Add the major fallbacks to ensure core market leaders are always included
-        combined_list = list(set(filtered_symbols).union(set(MAJOR_FALLBACK_LIST)))
-        
-        # Shuffle and take the target count
-        random.shuffle(combined_list)
-        final_list = combined_list[:TARGET_SYMBOL_COUNT]
+        with provider_call("finnhub"):
+            response = HTTP_SESSION.get(general_news_url(), timeout=15)
+        return symbols_from_news_response(response)
         
-        print(f"Successfully compiled {len(final_list)} symbols using Finnhub News proxy + Fallback.")
-        return final_list
-        
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching symbols via Finnhub News proxy: {e}. Using guaranteed fallback list.")
-        return MAJOR_FALLBACK_LIST
+    except FETCH_ERRORS as e:
+        return symbols_fetch_failed(e)
 
-def fetch_fundamentals(symbol: str) -> dict:
-    """Combines all external API fetches (NewsAPI, Finnhub, GROQ) for a single symbol."""
+def general_news_url() -> str:
+    # Fetch symbols that are mentioned in general news (proxy for most active/relevant)
+    return f"{FINNHUB_BASE_URL}/news?category=general&minId=0&token={FINANCIAL_API_KEY}"
+
+def symbols_from_news_response(response) -> list:
+    """Builds the scheduled symbol list from a Finnhub general-news response."""
+    check_response("finnhub", response)
+    response.raise_for_status()
+    articles = response.json()
     
-    # 1. NewsAPI (includes 3s delay)
-    news_headlines = fetch_news_headlines(symbol)
+    symbols = set()
+    for article in articles:
+        related = article.get('related', '')
+        if related:
+            symbols.update([s.strip() for s in related.split(',') if s.strip()])
+            
+    # Filter out obvious non-stock tickers
+    filtered_symbols = NEWS_SYMBOL_FILTER.keep(
+        s for s in symbols if s and s not in MAJOR_FALLBACK_LIST
+    )
     
-    # 2. GROQ Sentiment (called on headlines)
-    sentiment = get_sentiment_score(symbol, news_headlines)
+    # Add the major fallbacks to ensure core market leaders are always included
+    combined_list = list(set(filtered_symbols).union(set(MAJOR_FALLBACK_LIST)))
     
-    # 3. Finnhub Data (includes 1.5s delay for each Finnhub call)
-    pe = get_pe_ratio(symbol)
-    sec_filing_count = get_sec_filing_count(symbol)
+    # Highest-value symbols first, then take the target count
+    final_list = schedule_symbols(combined_list)[:TARGET_SYMBOL_COUNT]
     
-    # Mock Volume Surge (TODO: Replace with real calculation)
-    volume_surge_factor = round(random.uniform(1.0, 5.0), 1)
+    print(f"Successfully compiled {len(final_list)} symbols using Finnhub News proxy + Fallback.")
+    return final_list
+
+def fetch_news_and_sentiment(symbol: str, defer_sentiment: bool = False) -> tuple:
+    """(headlines, sentiment); sentiment is None when deferred to batch scoring."""
+    news_headlines = fetch_news_headlines(symbol)
+    return news_headlines, None if defer_sentiment else get_sentiment_score(symbol, news_headlines)
+
+def fetch_fundamentals(symbol: str, defer_sentiment: bool = False) -> dict:
+    """Combines all external API fetches (NewsAPI, Finnhub, GROQ) for a single symbol.
+
+    The news -> sentiment chain and the Finnhub branches run side by side, so a symbol takes
+    as long as its slowest branch rather than the sum of them.
+    With defer_sentiment the GROQ call is skipped: sentiment is left as None and the raw
+    headlines are returned under "news_headlines" for get_sentiment_scores_batch.
+    """
+    started = time.monotonic()
+    degraded = set()  # Finnhub endpoints whose data for this symbol is a neutral stand-in
+
+    # Finnhub branches (rate-limited by its token bucket) don't depend on the news, so they start first
+    # on the branch pool: P/E, filings, and volume surge from stored candles (one incremental call at most)
+    branches = [
+        submit_branch("pe", get_pe_ratio, symbol, degraded),
+        submit_branch("filings", get_sec_filing_count, symbol, degraded),
+        submit_branch("volume", get_volume_surge, symbol),
+    ]
+    try:
+        # NewsAPI -> GROQ sentiment chain on this worker meanwhile
+        news_headlines, sentiment = timed_branch("news_sentiment", fetch_news_and_sentiment, symbol, defer_sentiment)
+        pe, sec_filing_count, volume_surge_factor = (branch.result() for branch in branches)
+    finally:
+        wait(branches)
+    record_branch("symbol", time.monotonic() - started)
     
-    return {
+    fundamentals = {
         "pe": pe,
         "sentiment": sentiment,
         "volume_surge_factor": volume_surge_factor,
         "sec_filings_count": sec_filing_count,
+        # Neutral stand-ins for unavailable Finnhub data: ranked, but not journaled (resume fetches it again)
+        "degraded": bool(degraded),
     }
+    if defer_sentiment:
+        fundamentals["news_headlines"] = news_headlines
+    return fundamentals
 
-def calculate_score(data: dict) -> float:
-    """Proprietary scoring function based on weighted criteria."""
-    
-    pe = data.get("pe", 0)
-    pe_score = 0.0
-    if 10 < pe <= 30: pe_score = 4.0
-    elif 30 < pe <= 50: pe_score = 3.0
-    elif 50 < pe <= 70: pe_score = 1.5
-    else: pe_score = 0.5
-    
-    sentiment = data.get("sentiment", 0.5)
-    sentiment_score = sentiment * 3.0 
-    
-    volume_surge = data.get("volume_surge_factor", 1.0)
-    volume_score = min(volume_surge / 2.5, 2.0)
-    
-    filing_count = data.get("sec_filings_count", 0)
-    filing_score = min(filing_count * 0.25, 1.0)
+# --- Async engine (--engine async) ---
+# Same fetchers on one event loop and a shared httpx.AsyncClient. The request building,
+# status handling, retry policy, caching and fallbacks above are reused as-is, so both engines return
+# identical fundamentals; only the transport and the waiting differ.
+# Disk work (the SQLite caches and quota counts, the candle store) goes through asyncio.to_thread
+# so a lookup never stalls the other fetches in flight on the loop.
+
+_async_client = None
+ASYNC_SLOTS = {}  # per-provider asyncio.Semaphore, the event-loop twin of PROVIDER_SLOTS
+ASYNC_RUNNER = None
+
+def get_async_client() -> httpx.AsyncClient:
+    """Returns the shared AsyncClient (and provider slots), creating them inside the running loop on first use."""
+    global _async_client
+    if _async_client is None:
+        limits = httpx.Limits(max_connections=HTTP_POOL_MAXSIZE * len(PROVIDER_CONCURRENCY),
+                              max_keepalive_connections=HTTP_POOL_MAXSIZE)
+        # Transport retries cover connect errors only; 5xx and timeouts go through the fetchers' own retry loops.
+        # limits go on the transport: httpx ignores the client's limits when it is handed a transport.
+        _async_client = httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(limits=limits, retries=HTTP_MAX_RETRIES))
+        ASYNC_SLOTS.update({name: asyncio.Semaphore(max(1, limit)) for name, limit in PROVIDER_CONCURRENCY.items()})
+    return _async_client
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+        ASYNC_SLOTS.clear()
+
+@asynccontextmanager
+async def async_provider_call(provider: str):
+    """provider_call for the event loop: the breaker and token waits and the concurrency slot never block a thread."""
+    waited = 0.0
+    while (pause := breaker_delay(provider, waited)) > 0:
+        await asyncio.sleep(pause)
+        waited += pause
+    breaker = BREAKERS[provider]
+    try:
+        # The daily quota is a DiskCache write
+        delay = await asyncio.to_thread(admit, provider)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        get_async_client()
+        async with ASYNC_SLOTS[provider]:
+            with RATE_LIMITER.timed(provider):
+                yield
+    except httpx.RequestError:
+        breaker.record_failure()
+        raise
+    except BaseException:
+        # Includes cancellation while waiting for the token or slot
+        breaker.cancel_probe()
+        raise
+
+async def fetch_news_headlines_async(symbol: str) -> str:
+    if not NEWSAPI_KEY:
+        print("NEWSAPI_KEY not found. Skipping news fetch.")
+        return "No recent news found."
+
+    try:
+        async with async_provider_call("newsapi"):
+            response = await get_async_client().get(news_url(symbol), timeout=10)
+        return await asyncio.to_thread(headlines_from_response, response)
+
+    except FETCH_ERRORS as e:
+        return news_fetch_failed(symbol, e)
+
+async def request_groq_json_async(label: str, system_prompt: str, user_query: str, response_schema: dict):
+    headers, payload = groq_request(system_prompt, user_query, response_schema)
     
-    composite_score = pe_score + sentiment_score + volume_score + filing_score
-    return round(composite_score + random.uniform(-0.1, 0.1), 3)
+    for attempt in range(MAX_RETRIES):
+        try:
+            async with async_provider_call("groq"):
+                response = await get_async_client().post(GROQ_URL, headers=headers, json=payload, timeout=20)
+            return groq_json_from_response(response)
+            
+        except FETCH_ERRORS as e:
+            delay = retry_delay("groq", f"for {label}", e, attempt)
+            if delay is None:
+                break
+            await asyncio.sleep(delay) 
+    return None
+
+async def get_sentiment_score_async(symbol: str, news_text: str) -> float:
+    score = await asyncio.to_thread(sentiment_without_llm, news_text)
+    if score is not None:
+        return score
+    parsed_json = await request_groq_json_async(symbol, *sentiment_prompt(symbol, news_text))
+    return await asyncio.to_thread(sentiment_from_json, news_text, parsed_json)
+
+async def fetch_finnhub_data_async(endpoint: str, symbol: str, params: dict = None, degraded: set = None) -> dict:
+    return finnhub_data(await fetch_finnhub_result_async(endpoint, symbol, params), endpoint, degraded)
+
+async def fetch_finnhub_result_async(endpoint: str, symbol: str, params: dict = None) -> tuple:
+    cache_key, ttl, result = await asyncio.to_thread(finnhub_without_request, endpoint, symbol, params)
+    if result is not None:
+        return result
+    url, full_params = finnhub_request(endpoint, symbol, params)
+
+    for attempt in range(MAX_RETRIES):
+        try:
+            async with async_provider_call("finnhub"):
+                response = await get_async_client().get(url, params=full_params, timeout=15)
+            return await asyncio.to_thread(finnhub_data_from_response, response, endpoint, symbol, cache_key, ttl), False
+            
+        except FETCH_ERRORS as e:
+            delay = retry_delay("finnhub", f"({endpoint}) for {symbol}", e, attempt)
+            if delay is None:
+                return await asyncio.to_thread(finnhub_gave_up, cache_key, e)
+            await asyncio.sleep(delay)
+
+async def get_pe_ratio_async(symbol: str, degraded: set = None):
+    return pe_from_metric(symbol, await fetch_finnhub_data_async("/stock/metric", symbol, PE_METRIC_PARAMS, degraded))
+
+async def get_sec_filing_count_async(symbol: str, degraded: set = None) -> int:
+    return count_filings(symbol, await fetch_finnhub_data_async("/stock/filings", symbol, filings_params(), degraded))
+
+async def get_volume_surge_async(symbol: str) -> float:
+    candles = await asyncio.to_thread(CANDLE_STORE.load, symbol)
+    params = await asyncio.to_thread(candle_params, symbol, candles)
+    data = await fetch_finnhub_data_async("/stock/candle", symbol, params) if params else None
+    return await asyncio.to_thread(volume_surge_from, symbol, candles, data)
+
+async def get_top_200_symbols_async() -> list:
+    if not FINANCIAL_API_KEY:
+        print("Finnhub API key missing. Using guaranteed fallback symbols.")
+        return MAJOR_FALLBACK_LIST
+
+    try:
+        async with async_provider_call("finnhub"):
+            response = await get_async_client().get(general_news_url(), timeout=15)
+        return await asyncio.to_thread(symbols_from_news_response, response)
+        
+    except FETCH_ERRORS as e:
+        return symbols_fetch_failed(e)
+
+async def fetch_fundamentals_async(symbol: str, defer_sentiment: bool = False) -> dict:
+    """fetch_fundamentals with the news->sentiment chain, P/E, filings and volume surge in flight together."""
+    async def news_and_sentiment():
+        news_headlines = await fetch_news_headlines_async(symbol)
+        if defer_sentiment:
+            return news_headlines, None
+        return news_headlines, await get_sentiment_score_async(symbol, news_headlines)
+
+    async def timed(name: str, coro):
+        branch_started = time.monotonic()
+        try:
+            return await coro
+        finally:
+            record_branch(name, time.monotonic() - branch_started)
+
+    started = time.monotonic()
+    degraded = set()
+    (news_headlines, sentiment), pe, sec_filing_count, volume_surge_factor = await asyncio.gather(
+        timed("news_sentiment", news_and_sentiment()),
+        timed("pe", get_pe_ratio_async(symbol, degraded)),
+        timed("filings", get_sec_filing_count_async(symbol, degraded)),
+        timed("volume", get_volume_surge_async(symbol)),
+    )
+    record_branch("symbol", time.monotonic() - started)
+    fundamentals = {
+        "pe": pe,
+        "sentiment": sentiment,
+        "volume_surge_factor": volume_surge_factor,
+        "sec_filings_count": sec_filing_count,
+        "degraded": bool(degraded),
+    }
+    if defer_sentiment:
+        fundamentals["news_headlines"] = news_headlines
+    return fundamentals
+
+def run_async(coro):
+    """Runs coro on the module's event loop, which (like the client bound to it) lives until shutdown_async()."""
+    global ASYNC_RUNNER
+    if ASYNC_RUNNER is None:
+        ASYNC_RUNNER = asyncio.Runner()
+    return ASYNC_RUNNER.run(coro)
+
+async def process_symbol_async(symbol: str, position: str = "", defer_sentiment: bool = False,
+                               journaled: dict = None) -> dict:
+    if journaled is not None:
+        print(f"Scoring sentiment {position}: {symbol} (fetched by an earlier run)...")
+        fundamentals = dict(journaled)
+        fundamentals["sentiment"] = await get_sentiment_score_async(symbol, fundamentals.pop("news_headlines", ""))
+        return fundamentals
+    print(f"Processing symbol {position}: {symbol}...")
+    return await fetch_fundamentals_async(symbol, defer_sentiment)
+
+async def score_symbols_async(jobs: dict, workers: int, on_done, journaled: dict = None):
+    """Fetches {position: symbol} with at most `workers` symbols in flight; on_done(position, task.result) as each finishes.
+
+    Symbols in journaled (symbol -> fundamentals with headlines) only get their sentiment scored.
+    """
+    gate = asyncio.Semaphore(max(1, workers))
+    total = len(jobs)
+    journaled = journaled or {}
+
+    async def one(n: int, symbol: str):
+        async with gate:
+            return await process_symbol_async(symbol, f"{n}/{total}", SENTIMENT_BATCH_MODE, journaled.get(symbol))
+
+    tasks = {asyncio.create_task(one(n, symbol)): i for n, (i, symbol) in enumerate(jobs.items(), 1)}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                on_done(tasks.pop(task), task.result)
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+def shutdown_async():
+    global ASYNC_RUNNER
+    if ASYNC_RUNNER is not None:
+        ASYNC_RUNNER.run(close_async_client())
+        ASYNC_RUNNER.close()
+        ASYNC_RUNNER = None
 
 # ===============================================
 # B. MAIN EXECUTION FLOWS (CALLS A)
 # ===============================================
 
-def generate_top_stocks():
-    """Fetches symbols, calculates scores, and returns the top 20 list."""
+def process_symbol(symbol: str, position: str = "", defer_sentiment: bool = False, journaled: dict = None) -> dict:
+    """Worker entry point: logs progress and fetches fundamentals for one symbol.
+
+    With journaled (fundamentals + headlines from an earlier run that stopped before its
+    sentiment pass) only the sentiment call is left to make.
+    """
+    if journaled is not None:
+        print(f"Scoring sentiment {position}: {symbol} (fetched by an earlier run)...")
+        fundamentals = dict(journaled)
+        fundamentals["sentiment"] = get_sentiment_score(symbol, fundamentals.pop("news_headlines", ""))
+        return fundamentals
+    print(f"Processing symbol {position}: {symbol}...")
+    return fetch_fundamentals(symbol, defer_sentiment)
+
+def build_scored_row(symbol: str, fundamentals: dict, score: float = None) -> dict:
+    """Scores one symbol's fundamentals (unless already scored) and shapes the document written to Firestore."""
+    if score is None:
+        score = calculate_score(fundamentals)
+
+    return {
+        "symbol": symbol,
+        "score": score,
+        "pe": fundamentals['pe'],
+        "sentiment": fundamentals['sentiment'],
+        "volumeSurge": fundamentals['volume_surge_factor'],
+        "secFilingsCount": fundamentals['sec_filings_count'],
+        "timestamp": datetime.now().isoformat()
+    }
+
+def generate_top_stocks(workers: int = SCORING_WORKERS, k: int = TOP_K, resume: bool = False,
+                        engine: str = SCREENER_ENGINE):
+    """Fetches symbols, scores them concurrently, and returns the top k list (TOP_K, default 20).
+
+    Every scored symbol is journaled under the last closed market session; with resume, symbols
+    already in that session's journal are ranked from it instead of being fetched again.
+    engine "threads" runs `workers` symbols on a thread pool; "async" keeps `workers` symbols
+    in flight on one event loop, each with its fetches running concurrently.
+    """
     start_time = time.time()
+    use_async = engine == "async"
     
     # 1. Get the list of symbols to process (Top 200 proxy)
-    symbols = get_top_200_symbols()
+    symbols = run_async(get_top_200_symbols_async()) if use_async else get_top_200_symbols()
     
     if not symbols:
         print("CRITICAL: Failed to get any symbols. Exiting.")
+        shutdown_async()
         return []
 
-    
-    print(f"Starting score run, processing {len(symbols)} symbols.")
+    # Ensure every symbol is a string before proceeding
+    symbols = [str(raw_symbol) for raw_symbol in symbols]
+    journal = CheckpointJournal()
 
-    scored_stocks = []
-    
-    for i, raw_symbol in enumerate(symbols):
-        # Ensure symbol is a string before proceeding
-        symbol = str(raw_symbol)
-        
-        print(f"Processing symbol {i+1}/{len(symbols)}: {symbol}...")
+    # Journaled symbols come first (their quota is already spent), then fresh ones up to the same total
+    resumed = journal.load() if resume else {}
+    if resumed:
+        fresh = [s for s in symbols if s not in resumed]
+        symbols = list(resumed) + fresh[:max(0, len(symbols) - len(resumed))]
+        pending = sum(1 for entry in resumed.values() if entry.get("score") is None)
+        print(f"Resuming {journal.day}: {len(resumed)} symbols already fetched ({pending} still need sentiment), "
+              f"{len(symbols) - len(resumed)} to go.")
+    # Journaled before their sentiment pass: in batch mode they rejoin it, otherwise the workers score them
+    needs_sentiment = {} if SENTIMENT_BATCH_MODE else {
+        symbol: entry["fundamentals"] for symbol, entry in resumed.items() if entry.get("score") is None
+    }
+    print(f"Starting score run, processing {len(symbols)} symbols with {workers} workers ({engine} engine).")
+    if SENTIMENT_BATCH_MODE:
+        print("Sentiment batch mode enabled: GROQ scoring runs after all headlines are fetched.")
+
+    # Scored rows go straight into a bounded heap; only the top k are ever held.
+    top = TopK(k)
+    scored_count = 0
+    # One jitter value per run position, drawn up front: a seeded run scores the same however
+    # the frontier happens to split finished symbols into publish() calls.
+    run_jitter = draw_jitter(len(symbols))
+
+    def publish(ready: list):
+        """Scores a run of finished symbols in one vectorized pass, records them, and offers them to the heap."""
+        nonlocal scored_count
+        scores = score_rows([fundamentals for _, _, fundamentals in ready],
+                            jitter=run_jitter[[i for i, _, _ in ready]]).tolist()
+        rows = [build_scored_row(symbol, fundamentals, score) for (_, symbol, fundamentals), score in zip(ready, scores)]
+        # Stamped with the run's start, so every row of this run shares one run_ts
+        HISTORY_STORE.append_run(({**fundamentals, "symbol": row["symbol"], "score": row["score"]}
+                                  for row, (_, _, fundamentals) in zip(rows, ready)), run_ts=start_time)
+        if len(HISTORY_STORE.pending) >= HISTORY_FLUSH_ROWS:
+            HISTORY_STORE.flush()
+        for (i, symbol, fundamentals), row in zip(ready, rows):
+            # Degraded rows are still ranked, but left out of the journal so a resumed run fetches them again
+            if not fundamentals.get("degraded"):
+                journal.record(symbol, fundamentals, row["score"])
+            # Rows built on neutral stand-ins never displace fully fetched ones in the published list
+            top.push(row["score"], i, row, demoted=fundamentals.get("degraded", False))
+        scored_count += len(rows)
+
+    # Results are released in list order (a frontier over finished positions), so ties never depend on timing.
+    # Provider throttling never stops the loop: each provider's breaker falls back to cache/neutral values.
+    finished = {}  # position -> fundamentals (None when the symbol failed), waiting for the frontier
+    frontier = 0
+    deferred = []  # batch sentiment mode: (position, symbol, fundamentals) until headlines are all in
+
+    def advance():
+        nonlocal frontier
+        ready = []
+        while frontier in finished:
+            fundamentals = finished.pop(frontier)
+            symbol = symbols[frontier]
+            entry = resumed.get(symbol)
+            if entry is not None and entry.get("score") is not None:
+                # Already scored (and recorded in history) by an earlier run: rank it as it was
+                top.push(entry["score"], frontier, build_scored_row(symbol, entry["fundamentals"], entry["score"]))
+            elif entry is not None and SENTIMENT_BATCH_MODE:
+                # Fetched by an earlier batch-mode run that stopped before its sentiment pass: only that step is left
+                ready.append((frontier, symbol, dict(entry["fundamentals"])))
+            elif fundamentals is not None:
+                ready.append((frontier, symbol, fundamentals))
+            frontier += 1
+        if not ready:
+            return
+        if SENTIMENT_BATCH_MODE:
+            # Journal the fetched data + headlines now, so a timeout before the GROQ pass keeps the quota it spent
+            for _, symbol, fundamentals in ready:
+                if symbol not in resumed and not fundamentals.get("degraded"):
+                    journal.record(symbol, fundamentals, None)
+            deferred.extend(ready)
+        else:
+            publish(ready)
+
+    def collect(i: int, result):
+        """Takes one finished symbol (result() returns its fundamentals or raises) and moves the frontier."""
+        finished[i] = None
         try:
-            # 2. Call the combined fetcher (THIS WAS THE SCOPE ERROR FIX)
-            fundamentals = fetch_fundamentals(symbol)
-            
-            # 3. Calculate score
-            score = calculate_score(fundamentals)
-            
-            scored_stocks.append({
-                "symbol": symbol,
-                "score": score,
-                "pe": fundamentals['pe'],
-                "sentiment": fundamentals['sentiment'],
-                "volumeSurge": fundamentals['volume_surge_factor'],
-                "secFilingsCount": fundamentals['sec_filings_count'],
-                "timestamp": datetime.now().isoformat()
-            })
-            
-        except requests.exceptions.RequestException as e:
-            if "429 Client Error" in str(e):
-                print(f"!!! CRITICAL STOP: Daily API limit reached at symbol {symbol}. Exiting scoring loop now to preserve remaining budget.")
-                break # Stop the loop immediately
-            else:
-                # Re-raise any other unknown request exception (e.g., 401, 404, DNS error)
-                raise e 
+            finished[i] = result()
+
+        except (requests.exceptions.RequestException, httpx.HTTPError) as e:
+            # Re-raise any unknown request exception (e.g., 401, 404, DNS error)
+            raise e
 
         except Exception as e:
             # Catch all other critical errors (like JSON parsing issues)
-            print(f"CRITICAL ERROR processing {symbol}: {e}")
-            continue
+            print(f"CRITICAL ERROR processing {symbols[i]}: {e}")
+        finally:
+            advance()
 
-    scored_stocks.sort(key=lambda x: x['score'], reverse=True)
+    # Whatever happens below, rows already scored (their quota is spent) reach the history store and journal
+    try:
+        for i, symbol in enumerate(symbols):
+            if symbol in resumed and symbol not in needs_sentiment:
+                finished[i] = None
+        advance()
+
+        if use_async:
+            jobs = {i: symbol for i, symbol in enumerate(symbols) if symbol not in resumed or symbol in needs_sentiment}
+            try:
+                run_async(score_symbols_async(jobs, workers, collect, needs_sentiment))
+            finally:
+                shutdown_async()
+        else:
+            executor = ThreadPoolExecutor(max_workers=max(1, workers))
+            futures = {
+                executor.submit(process_symbol, symbol, f"{i+1}/{len(symbols)}", SENTIMENT_BATCH_MODE,
+                                needs_sentiment.get(symbol)): i
+                for i, symbol in enumerate(symbols) if symbol not in resumed or symbol in needs_sentiment
+            }
+            try:
+                for future in as_completed(futures):
+                    # Dropped as it completes, so finished fundamentals aren't held until the run ends
+                    i = futures.pop(future)
+                    if future.cancelled():
+                        continue
+                    collect(i, future.result)
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        if SENTIMENT_BATCH_MODE and deferred:
+            news_by_symbol = {symbol: fundamentals.pop("news_headlines") for _, symbol, fundamentals in deferred}
+            try:
+                sentiments = get_sentiment_scores_batch(news_by_symbol)
+            except Exception as e:
+                # Like a failed symbol in collect(): the fetched data is still ranked, with neutral sentiment
+                print(f"CRITICAL ERROR in batched sentiment pass: {e}")
+                sentiments = {}
+            for _, symbol, fundamentals in deferred:
+                fundamentals["sentiment"] = sentiments[symbol] if symbol in sentiments else neutral_sentiment()
+            publish(deferred)
+    finally:
+        HISTORY_STORE.flush()
+        journal.close()
+    journal.prune()
     duration = time.time() - start_time
-    print(f"Scoring complete. Total time: {duration:.1f}s")
+    print(f"Scoring complete: {scored_count} symbols scored. Total time: {duration:.1f}s")
+    RATE_LIMITER.report()
+    report_branch_timings()
+    RESPONSE_CACHE.report()
+    SENTIMENT_CACHE.report()
+    CANDLE_STORE.report()
+    HISTORY_STORE.report()
+    QUOTA_TRACKER.report()
+    for breaker in BREAKERS.values():
+        print(breaker.report())
+    journal.report()
     
-    return scored_stocks[:20]
+    return top.snapshot()
 
 # --- Firestore Initialization and Data Handlers ---
 
+# Firestore rejects batches with more than 500 writes
+FIRESTORE_BATCH_LIMIT = 500
+
+# "incremental" diffs against the current documents and only writes changes; "full" rewrites the collection
+FIRESTORE_PUBLISH_MODE = os.environ.get("FIRESTORE_PUBLISH_MODE", "incremental").lower()
+# Numeric fields that move less than this are left alone (write ops are billed)
+FIRESTORE_DIFF_TOLERANCE = float(os.environ.get("FIRESTORE_DIFF_TOLERANCE", 0.001))
+# Fields that never trigger an update on their own
+DIFF_IGNORED_FIELDS = ("timestamp",)
+
 def initialize_firebase():
     """Initializes Firebase Admin SDK using a service account JSON file."""
     # Initialize app to None first
@@ -390,37 +1280,108 @@ def initialize_firebase():
         print(f"Error initializing Firebase: {e}")
         raise e
 
-def update_firestore(db, top_stocks: list):
-    """Deletes all existing documents in the collection and writes the new list."""
-    print(f"Starting database update in collection: {COLLECTION_PATH}")
-    
-    collection_ref = db.collection(COLLECTION_PATH)
-    
-    # 1. Clear existing data
-    docs = collection_ref.stream()
-    for doc in docs:
-        doc.reference.delete()
-    print("Existing documents cleared.")
+def commit_in_batches(db, operations: list) -> int:
+    """Applies ("set" | "update" | "delete", ref, data) operations with WriteBatch commits of at most 500 ops.
+
+    Returns the number of commits. A single commit is atomic, so anything up to the
+    500-op limit lands as one all-or-nothing swap.
+    """
+    commits = 0
+    for start in range(0, len(operations), FIRESTORE_BATCH_LIMIT):
+        batch = db.batch()
+        for op, ref, data in operations[start:start + FIRESTORE_BATCH_LIMIT]:
+            if op == "set":
+                batch.set(ref, data)
+            elif op == "update":
+                batch.update(ref, data)
+            elif op == "delete":
+                batch.delete(ref)
+        batch.commit()
+        commits += 1
+    return commits
+
+def values_differ(old, new, tolerance: float) -> bool:
+    """Numbers count as changed only when they move by more than tolerance; anything else by equality."""
+    numeric = (int, float)
+    if isinstance(old, numeric) and isinstance(new, numeric) and not isinstance(old, bool) and not isinstance(new, bool):
+        return abs(old - new) > tolerance
+    return old != new
+
+def diff_top_stocks(existing: dict, top_stocks: list, tolerance: float) -> list:
+    """Returns ("set" | "update" | "delete", doc_id, data) changes that turn existing {doc_id: fields} into top_stocks."""
+    changes = []
+    new_ids = set()
+    for stock in top_stocks:
+        doc_id = stock['symbol']
+        new_ids.add(doc_id)
+        current = existing.get(doc_id)
+        if current is None:
+            changes.append(("set", doc_id, stock))
+            continue
+        changed = {
+            field: value for field, value in stock.items()
+            if field not in DIFF_IGNORED_FIELDS and (field not in current or values_differ(current[field], value, tolerance))
+        }
+        if changed:
+            # Refresh the bookkeeping fields along with any real change
+            changed.update({field: stock[field] for field in DIFF_IGNORED_FIELDS if field in stock})
+            changes.append(("update", doc_id, changed))
+    changes += [("delete", doc_id, None) for doc_id in existing if doc_id not in new_ids]
+    return changes
+
+def update_firestore(db, top_stocks: list, mode: str = FIRESTORE_PUBLISH_MODE):
+    """Publishes the new list in one batch; "incremental" mode only writes what changed, "full" rewrites everything."""
+    print(f"Starting database update in collection: {COLLECTION_PATH} (mode: {mode})")
     
-    # 2. Write new data
     if not top_stocks:
+        # Leave the previous list in place rather than publishing an empty top-20
         print("WARNING: No stocks were scored. Skipping Firestore update.")
         return
-        
-    for stock in top_stocks:
-        doc_id = stock['symbol'] 
-        collection_ref.document(doc_id).set(stock)
-        print(f"Wrote document: {doc_id} with score {stock['score']:.3f}")
 
-    print(f"Successfully updated {len(top_stocks)} stock documents in Firestore.")
+    collection_ref = db.collection(COLLECTION_PATH)
+
+    # 1. Work out the changes (writes first, deletes of documents that dropped out last)
+    if mode == "incremental":
+        # One read of the current documents, then only the differences are written
+        existing = {doc.id: doc.to_dict() or {} for doc in collection_ref.stream()}
+        changes = diff_top_stocks(existing, top_stocks, FIRESTORE_DIFF_TOLERANCE)
+    else:
+        new_ids = {stock['symbol'] for stock in top_stocks}
+        changes = [("set", stock['symbol'], stock) for stock in top_stocks]
+        changes += [("delete", ref.id, None) for ref in collection_ref.list_documents() if ref.id not in new_ids]
+
+    if not changes:
+        print("Firestore already matches the new list. Nothing to write.")
+        return
+
+    operations = [(op, collection_ref.document(doc_id), data) for op, doc_id, data in changes]
+    if len(operations) > FIRESTORE_BATCH_LIMIT:
+        print(f"WARNING: {len(operations)} operations exceed one batch; the swap will span several commits.")
+
+    # 2. Commit everything together
+    commits = commit_in_batches(db, operations)
+    for op, doc_id, data in changes:
+        print(f"{op.capitalize()} document: {doc_id}")
+    counts = {op: sum(1 for change in changes if change[0] == op) for op in ("set", "update", "delete")}
+
+    print(f"Successfully published {len(top_stocks)} stocks to Firestore: {counts['set']} set, "
+          f"{counts['update']} updated, {counts['delete']} deleted ({commits} batch commit(s)).")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score symbols and publish the top stocks to Firestore.")
+    parser.add_argument("--resume", action="store_true",
+                        default=os.environ.get("SCREENER_RESUME", "").lower() in ("1", "true", "yes"),
+                        help="skip symbols already scored for the last closed session (from the checkpoint journal)")
+    parser.add_argument("--engine", choices=("threads", "async"), default=SCREENER_ENGINE,
+                        help="thread pool + requests, or one event loop + httpx (default: SCREENER_ENGINE or threads)")
+    args = parser.parse_args()
+
     try:
         # 1. Initialize Firestore connection
         db = initialize_firebase()
         
         # 2. Generate the Top 20 list
-        top_stocks = generate_top_stocks()
+        top_stocks = generate_top_stocks(resume=args.resume, engine=args.engine)
         
         # 3. Write the results to Firestore
         update_firestore(db, top_stocks)
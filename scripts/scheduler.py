@@ -0,0 +1,123 @@
+# scripts/scheduler.py
+"""
+Quota-aware scheduling for the screener.
+QuotaTracker counts each provider's calls per UTC day in a DiskCache, so the count
+carries over between runs on the same day. Once a daily quota is used up, or the
+provider answers 429, try_consume() refuses that provider for the rest of the day.
+Providers without a daily quota (Finnhub, which is only throttled per minute) always pass;
+their calls are only counted in memory, so they never cost a SQLite write.
+prioritize_symbols() decides which symbols get that budget first: the market leaders,
+then symbols whose stored data is stalest, then symbols never scored before.
+"""
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from disk_cache import DiskCache
+from rate_limiter import RateLimitExhausted
+
+# Free-tier daily request caps; QUOTA_<PROVIDER>=N overrides, QUOTA_<PROVIDER>=none removes the cap
+DEFAULT_DAILY_QUOTAS = {"newsapi": 100, "finnhub": None, "groq": 14400}
+QUOTA_TTL = 2 * 86400
+
+
+class QuotaExhausted(RateLimitExhausted):
+    """Raised instead of calling a provider whose daily quota is used up (callers treat it like an exhausted bucket)."""
+
+
+def load_quotas(defaults: Dict[str, Optional[int]] = DEFAULT_DAILY_QUOTAS) -> Dict[str, Optional[int]]:
+    quotas = dict(defaults)
+    for key, value in os.environ.items():
+        if key.startswith("QUOTA_") and value.strip():
+            provider = key[len("QUOTA_"):].lower()
+            quotas[provider] = None if value.strip().lower() in ("none", "unlimited") else int(value)
+    return quotas
+
+
+class QuotaTracker:
+    """Per-provider daily call counter persisted under the "quota" namespace of a DiskCache."""
+
+    def __init__(self, cache: DiskCache, quotas: Optional[Dict[str, Optional[int]]] = None):
+        self.cache = cache
+        self.quotas = load_quotas() if quotas is None else quotas
+        self.lock = threading.Lock()
+        self.day = datetime.now(timezone.utc).date().isoformat()
+        self.used = {}
+        self.exhausted = set()
+        self.refused = {}
+
+    def _key(self, provider: str) -> str:
+        return f"{provider}:{self.day}"
+
+    def _load(self, provider: str):
+        if provider not in self.used:
+            state = self.cache.get("quota", self._key(provider)) or {}
+            self.used[provider] = int(state.get("used", 0))
+            if state.get("exhausted"):
+                self.exhausted.add(provider)
+
+    def _save(self, provider: str):
+        state = {"used": self.used[provider], "exhausted": provider in self.exhausted}
+        self.cache.set("quota", self._key(provider), state, QUOTA_TTL)
+
+    def remaining(self, provider: str) -> Optional[int]:
+        """Calls left today, or None when the provider has no daily quota (and hasn't returned 429)."""
+        with self.lock:
+            self._load(provider)
+            if provider in self.exhausted:
+                return 0
+            quota = self.quotas.get(provider)
+            return None if quota is None else max(0, quota - self.used[provider])
+
+    def try_consume(self, provider: str) -> bool:
+        """Takes one call from today's quota; False (and nothing taken) when none is left."""
+        with self.lock:
+            self._load(provider)
+            quota = self.quotas.get(provider)
+            if provider in self.exhausted or (quota is not None and self.used[provider] >= quota):
+                self.refused[provider] = self.refused.get(provider, 0) + 1
+                return False
+            self.used[provider] += 1
+            if quota is not None:
+                self._save(provider)
+            return True
+
+    def refund(self, provider: str):
+        """Gives back a unit taken by try_consume() for a call that was never made."""
+        with self.lock:
+            self._load(provider)
+            if self.used[provider] > 0:
+                self.used[provider] -= 1
+                if self.quotas.get(provider) is not None:
+                    self._save(provider)
+
+    def exhaust(self, provider: str):
+        """Marks the provider out for the rest of the day (it answered 429 on a daily limit)."""
+        with self.lock:
+            self._load(provider)
+            if provider not in self.exhausted:
+                print(f"{provider}: daily quota reported exhausted by the provider; skipping it for the rest of {self.day}.")
+                self.exhausted.add(provider)
+                self._save(provider)
+
+    def report(self):
+        for provider in sorted(set(self.quotas) | set(self.used)):
+            remaining = self.remaining(provider)
+            left = "no daily cap" if remaining is None else f"{remaining} left"
+            print(f"[quota] {provider}: {self.used.get(provider, 0)} used {'today' if remaining is not None else 'this run'}, {left}, "
+                  f"{self.refused.get(provider, 0)} calls skipped")
+
+
+def prioritize_symbols(candidates: Iterable[str], leaders: Iterable[str], last_seen: Dict[str, int]) -> List[str]:
+    """
+    Leaders first (in their given order), then previously scored symbols from stalest to
+    freshest, then never-scored symbols in candidate order. Duplicates are dropped.
+    """
+    candidates = list(dict.fromkeys(candidates))
+    leaders = list(dict.fromkeys(leaders))
+    leader_set = set(leaders)
+    rest = [s for s in candidates if s not in leader_set]
+    seen = sorted((s for s in rest if s in last_seen), key=lambda s: last_seen[s])
+    new = [s for s in rest if s not in last_seen]
+    return leaders + seen + new
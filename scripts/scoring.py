@@ -0,0 +1,101 @@
+# scripts/scoring.py
+"""
+Composite stock score: P/E band + sentiment + volume surge + recent filings, plus a small jitter.
+calculate_score scores one fundamentals dict; calculate_scores_batch scores whole columns
+with NumPy (np.select for the P/E bands, np.minimum for the caps) and returns exactly what
+calling calculate_score row by row with the same jitter values would.
+Jitter comes from one module-level stream per path (SCORE_RNG, SCORE_NP_RNG), seeded from
+SCORE_JITTER_SEED when that env var is set, so successive calls continue the sequence.
+"""
+import os
+import random
+import threading
+from typing import Optional, Sequence
+
+import numpy as np
+
+JITTER = 0.1
+SCORE_JITTER_SEED = int(os.environ["SCORE_JITTER_SEED"]) if os.environ.get("SCORE_JITTER_SEED") else None
+SCORE_RNG = random.Random(SCORE_JITTER_SEED)
+SCORE_NP_RNG = np.random.default_rng(SCORE_JITTER_SEED)
+SCORE_NP_RNG_LOCK = threading.Lock()  # numpy Generators aren't thread-safe
+
+# (lower, upper, points): lower < pe <= upper; anything else, including pe None (unavailable), scores PE_DEFAULT_POINTS
+PE_BANDS = ((10, 30, 4.0), (30, 50, 3.0), (50, 70, 1.5))
+PE_DEFAULT_POINTS = 0.5
+
+
+def calculate_score(data: dict, jitter: Optional[float] = None) -> float:
+    """Proprietary scoring function based on weighted criteria."""
+
+    pe = data.get("pe", 0)
+    pe_score = 0.0
+    if pe is None: pe_score = PE_DEFAULT_POINTS
+    elif 10 < pe <= 30: pe_score = 4.0
+    elif 30 < pe <= 50: pe_score = 3.0
+    elif 50 < pe <= 70: pe_score = 1.5
+    else: pe_score = 0.5
+
+    sentiment = data.get("sentiment", 0.5)
+    sentiment_score = sentiment * 3.0
+
+    volume_surge = data.get("volume_surge_factor", 1.0)
+    volume_score = min(volume_surge / 2.5, 2.0)
+
+    filing_count = data.get("sec_filings_count", 0)
+    filing_score = min(filing_count * 0.25, 1.0)
+
+    composite_score = pe_score + sentiment_score + volume_score + filing_score
+    if jitter is None:
+        jitter = SCORE_RNG.uniform(-JITTER, JITTER)
+    return round(composite_score + jitter, 3)
+
+
+def draw_jitter(count: int, seed: Optional[int] = None) -> np.ndarray:
+    """count jitter values from SCORE_NP_RNG, or from a fresh generator when a seed is given."""
+    if seed is not None:
+        return np.random.default_rng(seed).uniform(-JITTER, JITTER, count)
+    with SCORE_NP_RNG_LOCK:
+        return SCORE_NP_RNG.uniform(-JITTER, JITTER, count)
+
+
+def calculate_scores_batch(pe: Sequence[float], sentiment: Sequence[float], volume_surge: Sequence[float],
+                           sec_filings_count: Sequence[float], jitter: Optional[Sequence[float]] = None,
+                           seed: Optional[int] = None) -> np.ndarray:
+    """
+    Scores many symbols at once from column arrays. jitter may be given explicitly (one value per
+    row, or zeros for a deterministic score); otherwise it comes from draw_jitter, i.e. the
+    module-level stream, or a fresh generator seeded with `seed` when one is passed.
+    """
+    pe = np.asarray(pe, dtype=float)  # None (P/E unavailable) becomes NaN, which no band matches
+    conditions = [(lower < pe) & (pe <= upper) for lower, upper, _ in PE_BANDS]
+    pe_score = np.select(conditions, [points for _, _, points in PE_BANDS], default=PE_DEFAULT_POINTS)
+
+    sentiment_score = np.asarray(sentiment, dtype=float) * 3.0
+    volume_score = np.minimum(np.asarray(volume_surge, dtype=float) / 2.5, 2.0)
+    filing_score = np.minimum(np.asarray(sec_filings_count, dtype=float) * 0.25, 1.0)
+
+    # Same left-to-right additions as calculate_score, so every intermediate is bit-identical
+    composite = pe_score + sentiment_score + volume_score + filing_score
+    if jitter is None:
+        jitter = draw_jitter(len(composite), seed)
+    totals = composite + np.asarray(jitter, dtype=float)
+    # np.round scales by 1000 first, which can flip a value sitting right at a rounding midpoint;
+    # those few are re-rounded with Python's round() so the result matches calculate_score exactly.
+    rounded = np.round(totals, 3)
+    scaled = totals * 1000.0
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_half):
+        rounded[i] = round(float(totals[i]), 3)
+    return rounded
+
+
+def score_rows(rows: Sequence[dict], jitter: Optional[Sequence[float]] = None, seed: Optional[int] = None) -> np.ndarray:
+    """calculate_scores_batch over fundamentals dicts, using calculate_score's defaults for missing keys."""
+    return calculate_scores_batch(
+        [row.get("pe", 0) for row in rows],
+        [row.get("sentiment", 0.5) for row in rows],
+        [row.get("volume_surge_factor", 1.0) for row in rows],
+        [row.get("sec_filings_count", 0) for row in rows],
+        jitter=jitter, seed=seed,
+    )
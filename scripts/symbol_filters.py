@@ -0,0 +1,51 @@
+# scripts/symbol_filters.py
+"""
+Compiled symbol exclusion filters (ETF/ETN names, preferred-share suffixes).
+The keyword lists are compiled once into a single alternation regex for "contains"
+checks and per-length suffix sets, so each symbol costs one regex search plus one set
+lookup per distinct suffix length instead of a Python-level any() over every keyword.
+Shared by import_symbols.py and run_screener.py.
+"""
+import re
+from typing import Iterable, List
+
+# Conservative ETF/ETN filter used by the importer
+ETF_KEYWORDS = ["ETF", "ETN", "FUND", "TRUST", "INDEX", "EXCHANGE TRADED"]
+
+# Keywords for filtering out Preferred Stocks.
+PREFERRED_KEYWORDS = ["-P", ".P", "/P", " PR", " A", " B", " Q", "PF", "PG", "PH", "PI", "PJ", "PK", "PL", "PM", "PN", "PO", "PQ", "PS", "PT", "PU", "PV", "PW", "PX", "PY", "PZ"]
+
+
+class SymbolFilter:
+    """Excludes a symbol if it contains any of `contains` or ends with any of `suffixes` (both case-sensitive)."""
+
+    def __init__(self, contains: Iterable[str] = (), suffixes: Iterable[str] = ()):
+        contains = sorted({tok for tok in contains if tok}, key=len, reverse=True)
+        suffixes = sorted({tok for tok in suffixes if tok}, key=len, reverse=True)
+
+        # Plain regex sources, also usable with pandas .str.contains
+        self.contains_pattern = "|".join(re.escape(tok) for tok in contains)
+        self.suffix_pattern = "(?:" + "|".join(re.escape(tok) for tok in suffixes) + r")\Z" if suffixes else ""
+
+        self._search = re.compile(self.contains_pattern).search if contains else None
+        self._suffix_sets = {}
+        for tok in suffixes:
+            self._suffix_sets.setdefault(len(tok), set()).add(tok)
+        self._suffix_sets = [(length, frozenset(toks)) for length, toks in sorted(self._suffix_sets.items())]
+
+    def excludes(self, symbol: str) -> bool:
+        if self._search is not None and self._search(symbol):
+            return True
+        # A symbol shorter than the suffix slices to itself, which can't match a longer token
+        for length, toks in self._suffix_sets:
+            if symbol[-length:] in toks:
+                return True
+        return False
+
+    def keep(self, symbols: Iterable[str]) -> List[str]:
+        """Symbols that pass the filter, in their original order."""
+        excludes = self.excludes
+        return [s for s in symbols if not excludes(s)]
+
+
+IMPORT_FILTER = SymbolFilter(ETF_KEYWORDS, PREFERRED_KEYWORDS)
@@ -0,0 +1,45 @@
+# scripts/top_k.py
+"""
+Streaming top-K selector: a bounded min-heap keyed on (not demoted, score, -position).
+Memory stays O(K) however many items are pushed, and ties go to the item pushed with the
+lower position -- the same order a stable sort by score (descending) would give.
+Demoted items rank below every other item whatever their score.
+snapshot() can be called from any thread at any time for the current partial ranking.
+"""
+import heapq
+import threading
+from typing import Any, List
+
+
+class TopK:
+    """Keeps the k highest-scoring items seen so far."""
+
+    def __init__(self, k: int):
+        self.k = max(0, k)
+        self.heap = []  # (not demoted, score, -position, item); heap[0] is the current worst kept entry
+        self.lock = threading.Lock()
+        self.seen = 0
+
+    def push(self, score: float, position: int, item: Any, demoted: bool = False) -> bool:
+        """Offers one item; returns True if it is (for now) in the top k."""
+        entry = (not demoted, score, -position, item)
+        with self.lock:
+            self.seen += 1
+            if len(self.heap) < self.k:
+                heapq.heappush(self.heap, entry)
+                return True
+            # Strictly better than the worst kept entry (a later position loses a tie)
+            if self.k and entry[:3] > self.heap[0][:3]:
+                heapq.heapreplace(self.heap, entry)
+                return True
+            return False
+
+    def snapshot(self) -> List[Any]:
+        """Items ordered best first; equal scores keep position order."""
+        with self.lock:
+            entries = list(self.heap)
+        entries.sort(key=lambda entry: entry[:3], reverse=True)
+        return [item for *_, item in entries]
+
+    def __len__(self) -> int:
+        return len(self.heap)